@@ -0,0 +1,35 @@
+"""Inicializa Django para los scripts de benchmark.
+
+Uso: `import _bootstrap` antes de importar modelos o vistas. Respeta las
+mismas variables de entorno que manage.py (DATABASE_URL, etc.).
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+
+def timed(fn, iterations: int) -> list[float]:
+    """Ejecuta `fn` N veces y devuelve las duraciones en milisegundos."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(label: str, samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    mean = sum(ordered) / len(ordered)
+    return f"{label:<28} mean={mean:7.2f}ms  p50={p50:7.2f}ms  p95={p95:7.2f}ms  n={len(ordered)}"
@@ -0,0 +1,69 @@
+"""Tiempo de dispenser.clustering.rank_sites con N puntos de demanda.
+
+Genera focos gaussianos sobre CABA más ruido uniforme y dispensers al azar;
+no toca la base.
+
+    python benchmarks/clustering.py --points 1000000 --dispensers 5000
+"""
+import argparse
+import time
+
+import numpy as np
+
+import _bootstrap  # noqa: F401
+from core.coords import normalize_coords
+from dispenser.clustering import rank_sites
+
+CENTER = (-34.6037, -58.3816)
+
+
+def synthetic_demand(points: int, hotspots: int, rng: np.random.Generator):
+    clustered = int(points * 0.8)
+    centers = rng.normal(CENTER, 0.08, size=(hotspots, 2))
+    which = rng.integers(0, hotspots, size=clustered)
+    # ~50 m de dispersión alrededor de cada foco.
+    lats = centers[which, 0] + rng.normal(0, 0.00045, clustered)
+    lons = centers[which, 1] + rng.normal(0, 0.00055, clustered)
+    noise = points - clustered
+    lats = np.concatenate([lats, rng.uniform(CENTER[0] - 0.2, CENTER[0] + 0.2, noise)])
+    lons = np.concatenate([lons, rng.uniform(CENTER[1] - 0.2, CENTER[1] + 0.2, noise)])
+    weights = rng.integers(1, 4, size=points)
+    return normalize_coords(lats), normalize_coords(lons), weights
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--hotspots", type=int, default=2000)
+    parser.add_argument("--dispensers", type=int, default=5000)
+    parser.add_argument("--eps", type=float, default=30.0)
+    parser.add_argument("--min-weight", type=float, default=3)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    lats, lons, weights = synthetic_demand(args.points, args.hotspots, rng)
+    dispenser_lats = normalize_coords(rng.uniform(CENTER[0] - 0.2, CENTER[0] + 0.2, args.dispensers))
+    dispenser_lons = normalize_coords(rng.uniform(CENTER[1] - 0.2, CENTER[1] + 0.2, args.dispensers))
+
+    samples = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        sites = rank_sites(
+            lats, lons, weights, dispenser_lats, dispenser_lons, eps=args.eps, min_weight=args.min_weight,
+            limit=args.limit,
+        )
+        samples.append(time.perf_counter() - start)
+
+    print(f"puntos={args.points:,} dispensers={args.dispensers:,} eps={args.eps}m min_weight={args.min_weight}")
+    print(f"top={len(sites['score']):,}  mejor={min(samples):.3f}s  promedio={sum(samples) / len(samples):.3f}s")
+    for rank in range(min(5, len(sites["score"]))):
+        print(
+            f"  #{rank + 1} ({sites['lat_e6'][rank] / 1e6:.5f}, {sites['lon_e6'][rank] / 1e6:.5f}) "
+            f"demanda={sites['weight'][rank]:.0f} distancia={sites['distance'][rank]:.0f}m score={sites['score'][rank]:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Latencia por request con y sin conexiones persistentes / pool.
+
+Cada modo corre en un subproceso porque la configuración de DATABASES se
+lee al arrancar Django. Requiere PostgreSQL (DATABASE_URL).
+
+    python benchmarks/db_connections.py --requests 500
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+MODES = {
+    "sin persistencia": {"DB_CONN_MAX_AGE": "0", "DB_POOL": "False"},
+    "CONN_MAX_AGE=60": {"DB_CONN_MAX_AGE": "60", "DB_POOL": "False"},
+    "pool psycopg": {"DB_CONN_MAX_AGE": "0", "DB_POOL": "True"},
+}
+
+
+def run_mode(label: str, iterations: int) -> None:
+    import _bootstrap
+    from django.core import signals
+    from django.test import RequestFactory
+
+    from dispenser.views import DispenserListCreateView
+
+    view = DispenserListCreateView.as_view()
+    factory = RequestFactory()
+
+    def one_request():
+        # Reproduce el ciclo del handler: request_started/finished son los que
+        # cierran o reciclan la conexión según CONN_MAX_AGE.
+        signals.request_started.send(sender=None)
+        try:
+            response = view(factory.get("/api/dispensers/"))
+            response.render()
+        finally:
+            signals.request_finished.send(sender=None)
+
+    one_request()  # calentamiento
+    print(_bootstrap.summarize(label, _bootstrap.timed(one_request, iterations)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--mode", choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.requests)
+        return
+
+    for label, overrides in MODES.items():
+        env = {**os.environ, **overrides}
+        subprocess.run(
+            [sys.executable, __file__, "--requests", str(args.requests), "--mode", label],
+            env=env,
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
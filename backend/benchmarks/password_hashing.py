@@ -0,0 +1,57 @@
+"""Logins por segundo: verificación de contraseña con PBKDF2 (default de
+Django) vs Argon2 con los parámetros de settings, con 1 hilo y con N hilos
+en el mismo proceso (lo que hace el login async con el thread pool).
+
+    python benchmarks/password_hashing.py --seconds 3 --threads 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import _bootstrap  # noqa: F401
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+
+from core.hashers import TunedArgon2PasswordHasher
+
+PASSWORD = "mate-amargo-2024"
+
+
+def logins_per_second(encoded: str, seconds: float, threads: int) -> float:
+    deadline = time.perf_counter() + seconds
+
+    def worker() -> int:
+        done = 0
+        while time.perf_counter() < deadline:
+            check_password(PASSWORD, encoded)
+            done += 1
+        return done
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(lambda _: worker(), range(threads)))
+    return total / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    hashers = {
+        "PBKDF2 (Django)": PBKDF2PasswordHasher(),
+        "Argon2 (settings)": TunedArgon2PasswordHasher(),
+    }
+    for label, hasher in hashers.items():
+        encoded = hasher.encode(PASSWORD, hasher.salt())
+        single = logins_per_second(encoded, args.seconds, 1)
+        multi = logins_per_second(encoded, args.seconds, args.threads)
+        print(
+            f"{label:<18} 1 hilo: {single:7.1f} logins/s   "
+            f"{args.threads} hilos: {multi:7.1f} logins/s ({multi / args.threads:6.1f} por hilo)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""CPU por request y bytes en el cable para el listado de dispensers y el
+resumen de solicitudes: JSONRenderer de DRF vs FastJSONRenderer, sin
+comprimir / gzip / brotli.
+
+Usa payloads sintéticos con la misma forma que las respuestas reales, así
+no depende del contenido de la base.
+
+    python benchmarks/rendering.py --dispensers 20000 --ubicaciones 5000
+"""
+import argparse
+import datetime
+import random
+import time
+from decimal import Decimal
+
+import _bootstrap  # noqa: F401
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+from core.compression import brotli, brotli_bytes, gzip_bytes
+from core.renderers import FastJSONRenderer, orjson
+
+
+def dispenser_payload(count: int) -> list:
+    rng = random.Random(1)
+    return [
+        {
+            "codigo_dispenser": i,
+            "nombre_dispenser": f"Dispenser {i}",
+            "estado": rng.random() < 0.5,
+            "permanencia": rng.random() < 0.3,
+            "ubicacion": {
+                "codigo_ubicacion": i,
+                "longitud": round(-58.38 + rng.uniform(-0.5, 0.5), 4),
+                "latitud": round(-34.60 + rng.uniform(-0.5, 0.5), 4),
+            },
+            "imagenes": [{"codigo_imagen": i, "ruta_imagen": f"dispensers/foto_{i}.jpg"}],
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def summary_payload(count: int) -> list:
+    rng = random.Random(2)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        {
+            "codigo_ubicacion": i,
+            "latitud": str(Decimal(-34.60 + rng.uniform(-0.5, 0.5)).quantize(Decimal("0.000001"))),
+            "longitud": str(Decimal(-58.38 + rng.uniform(-0.5, 0.5)).quantize(Decimal("0.000001"))),
+            "total": rng.randint(1, 50),
+            "ultima": now - datetime.timedelta(minutes=rng.randint(0, 100000)),
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def cpu_ms(fn, repeat: int) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) * 1000 / repeat
+
+
+def report(label: str, payload: list, repeat: int) -> None:
+    print(f"\n== {label} ({len(payload)} items)")
+    for renderer in (JSONRenderer(), FastJSONRenderer()):
+        body = renderer.render(payload)
+        ms = cpu_ms(lambda: renderer.render(payload), repeat)
+        print(f"  {type(renderer).__name__:<18} render={ms:8.2f}ms cpu  bytes={len(body):>10,}")
+
+    body = FastJSONRenderer().render(payload)
+    level = settings.COMPRESSION_GZIP_LEVEL
+    gz = gzip_bytes(body, level)
+    print(f"  gzip (nivel {level}){'':<6} comp={cpu_ms(lambda: gzip_bytes(body, level), repeat):8.2f}ms cpu  bytes={len(gz):>10,}")
+    if brotli is not None:
+        quality = settings.COMPRESSION_BROTLI_QUALITY
+        br = brotli_bytes(body, quality)
+        print(f"  brotli (q {quality}){'':<7} comp={cpu_ms(lambda: brotli_bytes(body, quality), repeat):8.2f}ms cpu  bytes={len(br):>10,}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dispensers", type=int, default=10000)
+    parser.add_argument("--ubicaciones", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("orjson no está instalado: FastJSONRenderer usa el encoder estándar.")
+    report("GET /api/dispensers/", dispenser_payload(args.dispensers), args.repeat)
+    report("GET /api/solicitudes/summary/", summary_payload(args.ubicaciones), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Latencia de la búsqueda en memoria (dispenser.search.TrigramIndex) con N nombres.
+
+Arma el índice con nombres sintéticos (barrio + calle + número), mide el
+tiempo de construcción y la latencia de consultas típicas: palabras
+completas, prefijos cortos, nombres con errores de tipeo y sin resultados.
+No toca la base; es el camino que se usa fuera de PostgreSQL.
+
+    python benchmarks/search.py --rows 100000
+"""
+import argparse
+import random
+import time
+
+import _bootstrap
+from dispenser.search import TrigramIndex
+
+BARRIOS = [
+    "Palermo", "Belgrano", "Recoleta", "Almagro", "Caballito", "Flores", "Boedo", "Balvanera",
+    "Villa Crespo", "Villa Urquiza", "Núñez", "Saavedra", "Colegiales", "Chacarita", "San Telmo",
+    "Montserrat", "Retiro", "Barracas", "La Boca", "Parque Patricios", "Mataderos", "Liniers",
+]
+CALLES = [
+    "Corrientes", "Santa Fe", "Rivadavia", "Cabildo", "Córdoba", "Callao", "Pueyrredón", "Medrano",
+    "Scalabrini Ortiz", "Juan B. Justo", "Gaona", "Directorio", "Independencia", "San Juan", "Belgrano",
+    "Libertador", "Figueroa Alcorta", "Las Heras", "Triunvirato", "Olazábal",
+]
+QUERIES = ["palermo", "santa fe", "corr", "villa urquisa", "cabildo 1200", "recoleta callao", "xyzw"]
+
+
+def synthetic_names(rows: int, rng: random.Random):
+    for codigo in range(1, rows + 1):
+        yield codigo, f"{rng.choice(BARRIOS)} {rng.choice(CALLES)} {rng.randint(1, 9999)} #{codigo}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = TrigramIndex("bench", synthetic_names(args.rows, random.Random(7)))
+    print(f"nombres={args.rows:,}  build={time.perf_counter() - start:.2f}s  trigramas={len(index.postings):,}")
+
+    for q in QUERIES:
+        found = len(index.search(q)[0])
+        samples = _bootstrap.timed(lambda: index.search(q), args.iterations)
+        print(_bootstrap.summarize(f"{q!r} ({found:,})", samples))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Latencia del resumen de demanda y del alta de solicitudes con histórico grande,
+antes y después de `archive_solicitudes`.
+
+Carga N solicitudes aceptadas antiguas más algo de demanda pendiente, mide
+las vistas SolicitudesSummaryAdminView y SolicitudCreateView, archiva y
+vuelve a medir. Escribe en la base de DATABASE_URL: usar una base de prueba.
+Los datos generados se borran al final salvo con --keep.
+
+    python benchmarks/solicitudes_archive.py --historical 10000000
+"""
+import argparse
+import io
+import math
+import time
+from datetime import timedelta
+
+import _bootstrap
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import Ubicacion
+from dispenser.models import Solicitud, SolicitudArchivada
+from dispenser.views import SolicitudCreateView, SolicitudesSummaryAdminView
+
+PREFIX = "bench_arch_"
+BATCH = 20_000
+# Fuera del rango de coordenadas reales para no chocar con datos existentes.
+BASE_LAT_E6 = -80_000_000
+
+
+def seed(historical: int, pending: int, users: int) -> tuple[list[User], User]:
+    comun, _ = Group.objects.get_or_create(name="Usuario Comun")
+    admin_group, _ = Group.objects.get_or_create(name="Administrador")
+
+    User.objects.bulk_create([User(username=f"{PREFIX}{i}", password="!") for i in range(users)], batch_size=BATCH)
+    bench_users = list(User.objects.filter(username__startswith=PREFIX).order_by("id"))
+    comun.user_set.add(*bench_users)
+    admin = User.objects.create(username=f"{PREFIX}admin", password="!")
+    admin.groups.add(admin_group)
+
+    # Cada (usuario, ubicación) es único: hacen falta total/users ubicaciones.
+    total = historical + pending
+    count = math.ceil(total / users)
+    Ubicacion.objects.bulk_create(
+        [Ubicacion(latitud_e6=BASE_LAT_E6 + i, longitud_e6=0) for i in range(count)], batch_size=BATCH
+    )
+    ubicaciones = list(
+        Ubicacion.objects.filter(latitud_e6__gte=BASE_LAT_E6, latitud_e6__lt=BASE_LAT_E6 + count, longitud_e6=0)
+        .order_by("latitud_e6")
+        .values_list("codigo_ubicacion", flat=True)
+    )
+
+    old = timezone.now() - timedelta(days=365)
+    start = time.perf_counter()
+    for offset in range(0, total, BATCH):
+        rows = []
+        for i in range(offset, min(offset + BATCH, total)):
+            aceptada = i < historical
+            rows.append(
+                Solicitud(
+                    user_id=bench_users[i % users].id,
+                    ubicacion_id=ubicaciones[i // users],
+                    estado=Solicitud.Estado.ACEPTADA if aceptada else Solicitud.Estado.PENDIENTE,
+                    aceptada_en=old if aceptada else None,
+                )
+            )
+        Solicitud.objects.bulk_create(rows)
+    print(f"carga: {total:,} solicitudes en {time.perf_counter() - start:.1f}s")
+    return bench_users, admin
+
+
+def measure(label: str, users: list[User], admin: User, iterations: int) -> None:
+    factory = APIRequestFactory()
+    summary_view = SolicitudesSummaryAdminView.as_view()
+    create_view = SolicitudCreateView.as_view()
+
+    def summary():
+        request = factory.get("/api/solicitudes/summary/")
+        force_authenticate(request, user=admin)
+        summary_view(request).render()
+
+    created = []
+    counter = iter(range(10**9))
+
+    def create():
+        # Usuario distinto por request para no chocar con el throttling.
+        n = next(counter)
+        request = factory.post(
+            "/api/solicitudes/",
+            {"latitud": -85 + n * 0.0001, "longitud": 10},
+            format="json",
+        )
+        force_authenticate(request, user=users[n % len(users)])
+        response = create_view(request)
+        assert response.status_code == 201, response.data
+        created.append(response.data["codigo_solicitud"])
+
+    summary()
+    print(_bootstrap.summarize(f"{label} summary", _bootstrap.timed(summary, iterations)))
+    print(_bootstrap.summarize(f"{label} create", _bootstrap.timed(create, iterations)))
+    Solicitud.objects.filter(codigo_solicitud__in=created).delete()
+    Ubicacion.objects.filter(latitud_e6__lt=-84_000_000, longitud_e6=10_000_000).delete()
+
+
+def cleanup() -> None:
+    Solicitud.objects.filter(user__username__startswith=PREFIX).delete()
+    SolicitudArchivada.objects.filter(user__username__startswith=PREFIX).delete()
+    User.objects.filter(username__startswith=PREFIX).delete()
+    Ubicacion.objects.filter(latitud_e6__lt=-79_000_000).delete()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--historical", type=int, default=1_000_000)
+    parser.add_argument("--pending", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="No borra los datos generados.")
+    args = parser.parse_args()
+
+    cache.clear()
+    cleanup()
+    users, admin = seed(args.historical, args.pending, args.users)
+    try:
+        measure("sin archivar", users, admin, args.iterations)
+
+        start = time.perf_counter()
+        call_command("archive_solicitudes", dias=30, batch_size=20_000, stdout=io.StringIO())
+        print(f"archivado: {time.perf_counter() - start:.1f}s")
+
+        cache.clear()
+        measure("archivado", users, admin, args.iterations)
+    finally:
+        if not args.keep:
+            cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+
+def gzip_bytes(data: bytes, level: int = 6) -> bytes:
+    # mtime=0 hace la salida determinística (mismo contenido, mismos bytes).
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def brotli_bytes(data: bytes, quality: int = 5) -> bytes:
+    return brotli.compress(data, quality=quality)
+
+
+def accepted_encodings(header: str) -> dict:
+    """Parsea Accept-Encoding a {codificación: q}."""
+    encodings = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[name.strip().lower()] = q
+    return encodings
+
+
+def choose_encoding(header: str):
+    """Devuelve "br", "gzip" o None según lo que acepta el cliente."""
+    encodings = accepted_encodings(header)
+    wildcard = encodings.get("*", 0.0)
+    if brotli is not None and encodings.get("br", wildcard) > 0:
+        return "br"
+    if encodings.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
@@ -0,0 +1,69 @@
+"""Coordenadas en punto fijo: enteros en microgrados (grados * 1e6).
+
+Las ubicaciones se guardan normalizadas a ROUND_DECIMALS decimales para que
+puntos casi iguales caigan en la misma fila; en microgrados eso es siempre un
+múltiplo de 10 ** (6 - ROUND_DECIMALS) y entra en un entero de 32 bits.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+COORD_SCALE = 1_000_000
+ROUND_DECIMALS = 4
+
+# Escala intermedia (nanogrados) para redondear: absorbe el ruido binario del
+# float sin doble redondeo para entradas de hasta 9 decimales. Con más
+# decimales solo puede fallar un empate exacto en nanogrados (127.20894999984603
+# -> 127208950000), y esos casos se resuelven con Decimal.
+_NANO_SCALE = 1_000_000_000
+
+
+def _normalize_exact(value: float, decimals: int) -> int:
+    """Camino lento: el redondeo decimal de siempre sobre repr(value)."""
+    rounded = Decimal(repr(value)).quantize(Decimal(1).scaleb(-decimals), rounding=ROUND_HALF_UP)
+    return int(rounded.scaleb(6))
+
+
+def normalize_coord(value: float, decimals: int = ROUND_DECIMALS) -> int:
+    """Redondea (half-up, alejándose de cero) a `decimals` y devuelve microgrados.
+
+    Primero se lleva a nanogrados enteros (1.00005 -> 1000050000, sin el
+    ruido del float) y después se redondea con aritmética entera, sin crear
+    Decimals. Da el mismo resultado que Decimal(str(value)).quantize(...):
+    los empates en nanogrados, los únicos que dependen de decimales más
+    allá del noveno, pasan por Decimal.
+    """
+    nano = round(value * _NANO_SCALE)
+    step = 10 ** (9 - decimals)
+    q, r = divmod(abs(nano), step)
+    if 2 * r == step:
+        return _normalize_exact(value, decimals)
+    if 2 * r > step:
+        q += 1
+    micro = q * step // (_NANO_SCALE // COORD_SCALE)
+    return micro if nano >= 0 else -micro
+
+
+def normalize_coords(values, decimals: int = ROUND_DECIMALS) -> np.ndarray:
+    """Versión vectorizada de `normalize_coord` para arrays (int64)."""
+    values = np.asarray(values, dtype=np.float64)
+    nano = np.rint(values * _NANO_SCALE).astype(np.int64)
+    step = 10 ** (9 - decimals)
+    q, r = np.divmod(np.abs(nano), step)
+    q += 2 * r >= step
+    result = np.sign(nano) * (q * step // (_NANO_SCALE // COORD_SCALE))
+    # Empates en nanogrados: mismo desempate exacto que normalize_coord.
+    for index in np.flatnonzero(2 * r == step):
+        result.flat[index] = _normalize_exact(float(values.flat[index]), decimals)
+    return result
+
+
+def to_degrees(value: int) -> float:
+    return value / COORD_SCALE
+
+
+def format_coord(value: int) -> str:
+    """Microgrados -> "-34.603700", el mismo texto que daba el DecimalField."""
+    sign = "-" if value < 0 else ""
+    whole, frac = divmod(abs(value), COORD_SCALE)
+    return f"{sign}{whole}.{frac:06d}"
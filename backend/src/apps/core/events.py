@@ -0,0 +1,275 @@
+"""Canal de eventos en tiempo real por Server-Sent Events.
+
+Cada proceso tiene un Hub que reparte los eventos a las conexiones SSE
+abiertas. Con EVENTS_BACKEND="memory" solo llegan los eventos publicados en
+el mismo proceso (desarrollo, un solo worker); con "redis" los eventos se
+publican en un canal pub/sub y cada proceso los reenvía a su hub, así todos
+los workers ven todo.
+
+Un evento se serializa una sola vez (el frame SSE en bytes) y el mismo
+objeto se encola para todos los suscriptores. Las vistas síncronas publican
+desde otro hilo; la entrega pasa al event loop con call_soon_threadsafe.
+
+Reconexión (Last-Event-ID): cada hub guarda los últimos eventos en el orden
+en que le llegaron, que es el mismo en todos los procesos (un solo canal de
+redis). Se reenvían los posteriores al último que vio el cliente; si ese
+evento no está en el buffer (hub recién iniciado, buffer rotado, otro
+proceso todavía no lo recibió) el hub no puede saber qué se perdió y pide
+resincronizar. Con redis los ids salen de un INCR compartido, así son
+únicos entre workers.
+"""
+import asyncio
+import collections
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import redis
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - dependencia opcional
+    redis = aioredis = None
+
+logger = logging.getLogger(__name__)
+
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+PING_FRAME = b": ping\n\n"
+
+
+class Event:
+    __slots__ = ("id", "topic", "frame")
+
+    def __init__(self, event_id: int, topic: str, frame: bytes):
+        self.id = event_id
+        self.topic = topic
+        self.frame = frame
+
+
+def format_frame(event_id: int, name: str, data) -> bytes:
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {name}\ndata: {payload}\n\n".encode()
+
+
+class Subscriber:
+    def __init__(self, topics: set[str], maxsize: int):
+        self.loop = asyncio.get_running_loop()
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event: Event) -> None:
+        # Corre en el loop del suscriptor.
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Cliente lento: se le pide resincronizar.
+            self.resync()
+
+    def resync(self) -> None:
+        """Descarta lo pendiente y encola None: el stream envía `resync` y cierra."""
+        self.overflowed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class Hub:
+    def __init__(self, replay_size: int):
+        self._lock = threading.Lock()
+        self._subscribers: set[Subscriber] = set()
+        self._recent = collections.deque(maxlen=replay_size)
+
+    def subscribe(self, topics: set[str], maxsize: int) -> Subscriber:
+        subscriber = Subscriber(topics, maxsize)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def dispatch(self, event: Event) -> None:
+        with self._lock:
+            self._recent.append(event)
+            subscribers = [s for s in self._subscribers if event.topic in s.topics]
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.put, event)
+            except RuntimeError:
+                # El loop ya cerró: la conexión murió sin pasar por unsubscribe.
+                self.unsubscribe(subscriber)
+
+    def replay(self, last_id: int) -> list[Event] | None:
+        """Eventos recibidos después de last_id, o None si last_id no está en el buffer.
+
+        Se busca por posición y no por `id > last_id`: lo que cuenta es el
+        orden de llegada, y sin el evento en el buffer no hay forma de saber
+        si falta algo.
+        """
+        with self._lock:
+            recent = list(self._recent)
+        for index in range(len(recent) - 1, -1, -1):
+            if recent[index].id == last_id:
+                return recent[index + 1 :]
+        return None
+
+    def reset(self) -> None:
+        """Hubo un corte en la recepción: se vacía el buffer y se resincroniza a todos."""
+        with self._lock:
+            self._recent.clear()
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.resync)
+            except RuntimeError:
+                self.unsubscribe(subscriber)
+
+
+class MemoryBackend:
+    def __init__(self, hub: Hub):
+        self.hub = hub
+
+    def publish(self, topic: str, name: str, data) -> None:
+        event_id = _next_id()
+        self.hub.dispatch(Event(event_id, topic, format_frame(event_id, name, data)))
+
+    async def ensure_listening(self) -> None:
+        pass
+
+
+class RedisBackend:
+    """Publica en un canal de redis; un task por proceso lo escucha y alimenta el hub."""
+
+    def __init__(self, hub: Hub, url: str, channel: str):
+        if redis is None:
+            raise RuntimeError("EVENTS_BACKEND=redis requiere el paquete redis")
+        self.hub = hub
+        self.url = url
+        self.channel = channel
+        self.id_key = f"{channel}:last_id"
+        self.client = redis.Redis.from_url(url)
+        self._listener: asyncio.Task | None = None
+        self._ready: asyncio.Event | None = None
+
+    def publish(self, topic: str, name: str, data) -> None:
+        try:
+            event_id = self.client.incr(self.id_key)
+            frame = format_frame(event_id, name, data)
+            message = json.dumps({"id": event_id, "topic": topic, "frame": frame.decode()})
+            self.client.publish(self.channel, message)
+        except redis.RedisError:
+            # Un evento perdido no debe romper la escritura que lo originó; los
+            # clientes lo notan al reconectar (el id no aparece y resincronizan).
+            logger.warning("No se pudo publicar el evento %s de %s", name, topic, exc_info=True)
+
+    async def ensure_listening(self) -> None:
+        """Arranca el listener si hace falta y espera a que esté suscripto.
+
+        Así el primer reset del hub ocurre antes de registrar suscriptores. Si
+        redis no responde se sigue igual: al conectar, el reset los resincroniza.
+        """
+        if self._listener is None or self._listener.done():
+            self._ready = asyncio.Event()
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._ready.wait(), settings.EVENTS_HEARTBEAT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("El listener de %s todavía no está suscripto", self.channel)
+
+    async def _listen(self) -> None:
+        while True:
+            client = aioredis.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    # Lo recibido antes de esta suscripción (o antes del corte) no
+                    # es continuo con lo que sigue.
+                    self.hub.reset()
+                    self._ready.set()
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        data = json.loads(message["data"])
+                        self.hub.dispatch(Event(data["id"], data["topic"], data["frame"].encode()))
+            except aioredis.RedisError:
+                logger.warning("Se perdió la suscripción a %s; reintentando", self.channel, exc_info=True)
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_last_id = 0
+_id_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            hub = Hub(settings.EVENTS_REPLAY_SIZE)
+            if settings.EVENTS_BACKEND == "redis":
+                _backend = RedisBackend(hub, settings.EVENTS_REDIS_URL, settings.EVENTS_CHANNEL)
+            else:
+                _backend = MemoryBackend(hub)
+        return _backend
+
+
+def _next_id() -> int:
+    # Backend memory: marca de tiempo en microsegundos, estrictamente creciente
+    # en el proceso y sin repetirse entre reinicios.
+    global _last_id
+    with _id_lock:
+        _last_id = max(time.time_ns() // 1000, _last_id + 1)
+        return _last_id
+
+
+def publish(topic: str, name: str, data) -> None:
+    get_backend().publish(topic, name, data)
+
+
+async def stream(topics: set[str], last_event_id: str | None = None):
+    """Generador async de frames SSE para una conexión."""
+    backend = get_backend()
+    await backend.ensure_listening()
+    subscriber = backend.hub.subscribe(topics, settings.EVENTS_QUEUE_SIZE)
+    try:
+        yield b"retry: %d\n\n" % settings.EVENTS_RETRY_MS
+        # El suscriptor se registra antes del replay para no perder eventos;
+        # los que lleguen por las dos vías se envían una sola vez.
+        replayed = set()
+        if last_event_id:
+            try:
+                missed = backend.hub.replay(int(last_event_id))
+            except ValueError:
+                missed = []
+            if missed is None:
+                yield RESYNC_FRAME
+            else:
+                for event in missed:
+                    if event.topic in topics:
+                        replayed.add(event.id)
+                        yield event.frame
+
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), settings.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield PING_FRAME
+                continue
+            if event is None:
+                yield RESYNC_FRAME
+                return
+            if event.id in replayed:
+                continue
+            yield event.frame
+    finally:
+        backend.hub.unsubscribe(subscriber)
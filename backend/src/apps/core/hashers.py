@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id con parámetros configurables (ARGON2_* en settings).
+
+    Mantiene el algoritmo "argon2": los hashes existentes se siguen
+    verificando y, si cambian los parámetros, Django los re-hashea en el
+    próximo login. argon2-cffi libera el GIL mientras calcula, así que
+    varios hilos de un mismo worker pueden hashear en paralelo.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
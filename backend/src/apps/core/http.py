@@ -0,0 +1,23 @@
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+
+
+def json_response(data, status: int = 200) -> HttpResponse:
+    """Respuesta JSON para vistas que no pasan por DRF (p. ej. las async).
+
+    Usa el mismo renderer que las vistas DRF para que la salida sea idéntica.
+    """
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(renderer.render(data), status=status, content_type=renderer.media_type)
+
+
+def error_response(request, exc: exceptions.APIException) -> HttpResponse:
+    """Error con el mismo cuerpo y headers que daría el exception handler de DRF."""
+    response = json_response({"detail": exc.detail}, status=exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        # Igual que APIView.get_authenticate_header: lo define el primer autenticador.
+        header = api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]().authenticate_header(request)
+        if header:
+            response["WWW-Authenticate"] = header
+    return response
@@ -0,0 +1,120 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+from .compression import brotli_bytes, choose_encoding, gzip_bytes
+from .routers import reading_from_replica
+
+REPLICA_PIN_COOKIE = "replica_pin"
+REPLICA_PIN_HEADER = "X-Replica-Pin-Until"
+
+
+class ReplicaRoutingMiddleware:
+    """Habilita lecturas desde réplica para GET sobre vistas con `replica_reads = True`.
+
+    Después de una escritura exitosa fija al cliente al primario durante
+    REPLICA_PIN_SECONDS (cookie + header que el cliente puede reenviar), así
+    ve sus propios cambios aunque la réplica tenga lag.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with reading_from_replica(self._replica_for(request)):
+            response = self.get_response(request)
+        return self._pin_after_write(request, response)
+
+    async def __acall__(self, request):
+        with reading_from_replica(self._replica_for(request)):
+            response = await self.get_response(request)
+        return self._pin_after_write(request, response)
+
+    def _replica_for(self, request) -> str | None:
+        """Réplica para todo el request, o None si tiene que leer del primario."""
+        if not settings.REPLICA_DATABASES or request.method not in SAFE_METHODS:
+            return None
+        if self._pinned_until(request) > time.time():
+            return None
+        try:
+            match = resolve(request.path_info, getattr(request, "urlconf", None))
+        except Resolver404:
+            return None
+        # DRF expone la clase como `cls`; las vistas de Django como `view_class`.
+        view_class = getattr(match.func, "cls", None) or getattr(match.func, "view_class", None)
+        if not getattr(view_class, "replica_reads", False):
+            return None
+        return random.choice(settings.REPLICA_DATABASES)
+
+    def _pinned_until(self, request) -> float:
+        value = request.headers.get(REPLICA_PIN_HEADER) or request.COOKIES.get(REPLICA_PIN_COOKIE)
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def _pin_after_write(self, request, response):
+        if not settings.REPLICA_DATABASES or request.method in SAFE_METHODS or response.status_code >= 400:
+            return response
+        until = time.time() + settings.REPLICA_PIN_SECONDS
+        response[REPLICA_PIN_HEADER] = f"{until:.3f}"
+        response.set_cookie(
+            REPLICA_PIN_COOKIE,
+            f"{until:.3f}",
+            max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True,
+            samesite="Lax",
+        )
+        return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Comprime con brotli o gzip las respuestas mayores a COMPRESSION_MIN_SIZE.
+
+    Las respuestas chicas no se comprimen: el costo de CPU no compensa los
+    pocos bytes ahorrados. Los streams y los contenidos ya comprimidos
+    (imágenes, binarios) pasan sin tocar.
+    """
+
+    skip_content_types = ("image/", "video/", "audio/", "application/zip", "application/gzip")
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        if response.get("Content-Type", "").startswith(self.skip_content_types):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding == "br":
+            compressed = brotli_bytes(response.content, settings.COMPRESSION_BROTLI_QUALITY)
+        elif encoding == "gzip":
+            compressed = gzip_bytes(response.content, settings.COMPRESSION_GZIP_LEVEL)
+        else:
+            return response
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        # El ETag fuerte deja de ser válido sobre el cuerpo comprimido.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
@@ -0,0 +1,42 @@
+# Estado actual de core en una sola migración, para bases nuevas. Las bases
+# existentes siguen usando las originales (listadas en `replaces`) hasta
+# que se puedan borrar.
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    replaces = [
+        ('core', '0001_initial'),
+        ('core', '0002_alter_ubicacion_latitud_longitud_float'),
+        ('core', '0002_ubicacion_decimal_unique'),
+        ('core', '0003_ubicacion_decimal_unique'),
+        ('core', '0004_ubicacion_microdegrees'),
+        ('core', '0005_imagen_ruta_index'),
+    ]
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Imagen',
+            fields=[
+                ('codigo_imagen', models.BigAutoField(primary_key=True, serialize=False)),
+                ('ruta_imagen', models.CharField(db_index=True, max_length=500)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Ubicacion',
+            fields=[
+                ('codigo_ubicacion', models.BigAutoField(primary_key=True, serialize=False)),
+                ('longitud_e6', models.IntegerField()),
+                ('latitud_e6', models.IntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('latitud_e6', 'longitud_e6'), name='uniq_ubicacion_lat_lon_e6')],
+            },
+        ),
+    ]
@@ -0,0 +1,91 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def decimal_to_microdegrees(apps, schema_editor):
+    Ubicacion = apps.get_model("core", "Ubicacion")
+    batch = []
+    for ubicacion in Ubicacion.objects.only("codigo_ubicacion", "latitud", "longitud").iterator(chunk_size=BATCH_SIZE):
+        ubicacion.latitud_e6 = int(ubicacion.latitud.scaleb(6).to_integral_value(rounding=ROUND_HALF_UP))
+        ubicacion.longitud_e6 = int(ubicacion.longitud.scaleb(6).to_integral_value(rounding=ROUND_HALF_UP))
+        batch.append(ubicacion)
+        if len(batch) >= BATCH_SIZE:
+            Ubicacion.objects.bulk_update(batch, ["latitud_e6", "longitud_e6"])
+            batch = []
+    if batch:
+        Ubicacion.objects.bulk_update(batch, ["latitud_e6", "longitud_e6"])
+
+
+def microdegrees_to_decimal(apps, schema_editor):
+    Ubicacion = apps.get_model("core", "Ubicacion")
+    batch = []
+    for ubicacion in Ubicacion.objects.only("codigo_ubicacion", "latitud_e6", "longitud_e6").iterator(chunk_size=BATCH_SIZE):
+        ubicacion.latitud = Decimal(ubicacion.latitud_e6).scaleb(-6)
+        ubicacion.longitud = Decimal(ubicacion.longitud_e6).scaleb(-6)
+        batch.append(ubicacion)
+        if len(batch) >= BATCH_SIZE:
+            Ubicacion.objects.bulk_update(batch, ["latitud", "longitud"])
+            batch = []
+    if batch:
+        Ubicacion.objects.bulk_update(batch, ["latitud", "longitud"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_ubicacion_decimal_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ubicacion",
+            name="latitud_e6",
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="ubicacion",
+            name="longitud_e6",
+            field=models.IntegerField(null=True),
+        ),
+        # Nullable durante la conversión para que la migración sea reversible.
+        migrations.AlterField(
+            model_name="ubicacion",
+            name="latitud",
+            field=models.DecimalField(decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AlterField(
+            model_name="ubicacion",
+            name="longitud",
+            field=models.DecimalField(decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.RunPython(decimal_to_microdegrees, microdegrees_to_decimal),
+        migrations.RemoveConstraint(
+            model_name="ubicacion",
+            name="uniq_ubicacion_lat_lon",
+        ),
+        migrations.RemoveField(
+            model_name="ubicacion",
+            name="latitud",
+        ),
+        migrations.RemoveField(
+            model_name="ubicacion",
+            name="longitud",
+        ),
+        migrations.AlterField(
+            model_name="ubicacion",
+            name="latitud_e6",
+            field=models.IntegerField(),
+        ),
+        migrations.AlterField(
+            model_name="ubicacion",
+            name="longitud_e6",
+            field=models.IntegerField(),
+        ),
+        migrations.AddConstraint(
+            model_name="ubicacion",
+            constraint=models.UniqueConstraint(fields=("latitud_e6", "longitud_e6"), name="uniq_ubicacion_lat_lon_e6"),
+        ),
+    ]
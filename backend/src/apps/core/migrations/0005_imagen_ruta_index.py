@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_ubicacion_microdegrees'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='imagen',
+            name='ruta_imagen',
+            field=models.CharField(db_index=True, max_length=500),
+        ),
+    ]
@@ -3,17 +3,18 @@ from django.db import models
 
 class Imagen(models.Model):
     codigo_imagen = models.BigAutoField(primary_key=True)
-    ruta_imagen = models.CharField(max_length=500)
+    # Indexada para que gc_media resuelva por lotes qué archivos siguen en uso.
+    ruta_imagen = models.CharField(max_length=500, db_index=True)
 
 
 class Ubicacion(models.Model):
     codigo_ubicacion = models.BigAutoField(primary_key=True)
-    # Guardamos coordenadas normalizadas para evitar micro-diferencias.
-    # Se escribe siempre con lógica de redondeo desde los endpoints.
-    longitud = models.DecimalField(max_digits=9, decimal_places=6)
-    latitud = models.DecimalField(max_digits=9, decimal_places=6)
+    # Coordenadas normalizadas en microgrados (ver core.coords) para evitar
+    # micro-diferencias. Se escribe siempre con lógica de redondeo desde los endpoints.
+    longitud_e6 = models.IntegerField()
+    latitud_e6 = models.IntegerField()
 
     class Meta:
         constraints = [
-            models.UniqueConstraint(fields=["latitud", "longitud"], name="uniq_ubicacion_lat_lon"),
+            models.UniqueConstraint(fields=["latitud_e6", "longitud_e6"], name="uniq_ubicacion_lat_lon_e6"),
         ]
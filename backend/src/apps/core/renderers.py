@@ -0,0 +1,30 @@
+from rest_framework.utils import encoders
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+_drf_encoder = encoders.JSONEncoder()
+
+
+def _default(obj):
+    # Tipos que orjson no conoce (Decimal, lazy strings, QuerySet, ...) se
+    # convierten igual que en el encoder de DRF para no cambiar la salida.
+    return _drf_encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer de DRF serializado con orjson cuando está instalado.
+
+    Si orjson no está disponible, o el cliente pide indentación (p. ej. la
+    API navegable), cae en el renderer estándar.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type or "", renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        return orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,44 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Alias de la réplica elegida para el request actual (None = primario). Lo
+# fija core.middleware.ReplicaRoutingMiddleware una vez por request, así todas
+# las consultas del request leen de la misma réplica y ven el mismo lag.
+_read_from_replica = ContextVar("read_from_replica", default=None)
+
+
+@contextmanager
+def reading_from_replica(alias: str | None):
+    token = _read_from_replica.set(alias)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+# Autenticación siempre contra el primario: request.user se resuelve tarde
+# (dentro del contexto de réplica) y un token o usuario recién creado
+# todavía puede no estar en la réplica.
+PRIMARY_ONLY_APPS = {"auth", "authtoken", "sessions", "contenttypes"}
+
+
+class ReplicaRouter:
+    """Envía lecturas a una réplica solo cuando el request lo habilitó.
+
+    Fuera de esos requests (escrituras, admin, comandos) todo va a `default`.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return "default"
+        return _read_from_replica.get() or "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primario y réplicas tienen los mismos datos.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """"10/min" -> (10, 60). Mismo formato que los rates de DRF."""
+    num, period = rate.split("/")
+    return int(num), PERIODS[period[0]]
+
+
+class TokenBucket:
+    """Token bucket guardado en el cache compartido (THROTTLE_CACHE).
+
+    Capacidad = ráfaga máxima; se recarga de forma continua a
+    capacity / period tokens por segundo. El get/set no es atómico: bajo
+    carrera extrema puede admitir algún request de más, igual que los
+    throttles de DRF, a cambio de un solo round-trip por operación.
+    """
+
+    def __init__(self, capacity: int, period: int):
+        self.capacity = capacity
+        self.refill_per_second = capacity / period
+        self.period = period
+        self.cache = caches[settings.THROTTLE_CACHE]
+
+    def consume(self, key: str, now: float | None = None) -> tuple[bool, float]:
+        """Intenta gastar un token. Devuelve (permitido, segundos a esperar)."""
+        now = time.time() if now is None else now
+        tokens, updated_at = self.cache.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_per_second)
+
+        if tokens < 1:
+            self.cache.set(key, (tokens, now), self.period)
+            return False, (1 - tokens) / self.refill_per_second
+
+        self.cache.set(key, (tokens - 1, now), self.period)
+        return True, 0.0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Limita escrituras por usuario (o IP si es anónimo) según `throttle_scope`.
+
+    Los budgets salen de settings.THROTTLE_BUCKETS; una vista sin scope o con
+    un scope sin budget no se limita. Los métodos seguros nunca se limitan.
+    DRF responde 429 con Retry-After a partir de `wait()`.
+    """
+
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def __init__(self):
+        self._wait = None
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        scope = getattr(view, "throttle_scope", None)
+        rate = settings.THROTTLE_BUCKETS.get(scope) if scope else None
+        if not rate:
+            return True
+
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+
+        allowed, self._wait = TokenBucket(*parse_rate(rate)).consume(
+            self.cache_format % {"scope": scope, "ident": ident}
+        )
+        return allowed
+
+    def wait(self):
+        return self._wait
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Dispenser, Solicitud
+from .models import Dispenser, Solicitud, SolicitudArchivada
 
 admin.site.register(Dispenser)
 admin.site.register(Solicitud)
+admin.site.register(SolicitudArchivada)
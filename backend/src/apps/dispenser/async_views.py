@@ -0,0 +1,155 @@
+from asgiref.sync import sync_to_async
+from django.utils.decorators import classonlymethod
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django.db.models import Count, Max
+from rest_framework import exceptions
+
+from core import events as core_events
+from core.coords import format_coord
+from core.http import error_response, json_response
+from users.authentication import aget_request_user, ais_administrador
+from . import events
+from .models import Dispenser, Solicitud
+from .serializers import DispenserSerializer
+from .views import DispenserDetailView, DispenserListCreateView, SolicitudesSummaryAdminView
+
+
+async def require_administrador(request):
+    """None si el usuario es administrador; si no, la respuesta 401/403 de DRF."""
+    try:
+        user = await aget_request_user(request)
+    except exceptions.AuthenticationFailed as exc:
+        return error_response(request, exc)
+    if user is None:
+        return error_response(request, exceptions.NotAuthenticated())
+    if not await ais_administrador(user):
+        return error_response(request, exceptions.PermissionDenied())
+    return None
+
+
+class AsyncReadView(View):
+    """Atiende GET/HEAD con el ORM async y delega el resto a la vista DRF síncrona.
+
+    Así un worker ASGI sirve muchas lecturas concurrentes sin ocupar un hilo
+    por conexión, y las escrituras conservan validación y permisos de DRF.
+    """
+
+    sync_view_class = None
+    sync_view = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        initkwargs.setdefault("sync_view", sync_to_async(cls.sync_view_class.as_view()))
+        view = super().as_view(**initkwargs)
+        # La vista DRF ya es csrf_exempt; la envoltura tiene que serlo también.
+        return csrf_exempt(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            return await self.get(request, *args, **kwargs)
+        return await self.sync_view(request, *args, **kwargs)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.get is AsyncReadView.get:
+            raise TypeError(f"{cls.__name__} tiene que definir `async def get`.")
+
+    async def get(self, request, *args, **kwargs):
+        """Lectura async; la define cada subclase."""
+
+
+class DispenserListAsyncView(AsyncReadView):
+    sync_view_class = DispenserListCreateView
+    replica_reads = True
+
+    async def get(self, request):
+        if (
+            request.GET.get("format")
+            or request.GET.get("q", "").strip()
+            or "application/vnd.anymate.markers" in request.headers.get("Accept", "")
+        ):
+            # La negociación de formatos compactos y la búsqueda las resuelve la vista DRF.
+            return await self.sync_view(request)
+
+        qs = Dispenser.objects.select_related("ubicacion").prefetch_related("imagenes").all().order_by("codigo_dispenser")
+        dispensers = [d async for d in qs]
+        return json_response(DispenserSerializer(dispensers, many=True).data)
+
+
+class DispenserDetailAsyncView(AsyncReadView):
+    sync_view_class = DispenserDetailView
+    replica_reads = True
+
+    async def get(self, request, codigo_dispenser: int):
+        qs = Dispenser.objects.select_related("ubicacion").prefetch_related("imagenes")
+        try:
+            dispenser = await aget_object_or_404(qs, codigo_dispenser=codigo_dispenser)
+        except Http404 as exc:
+            # Mismo mensaje que la vista síncrona (DRF convierte Http404 en NotFound).
+            return error_response(request, exceptions.NotFound(*exc.args))
+        return json_response(DispenserSerializer(dispenser).data)
+
+
+class SolicitudesSummaryAdminAsyncView(AsyncReadView):
+    sync_view_class = SolicitudesSummaryAdminView
+    replica_reads = True
+
+    async def get(self, request):
+        denied = await require_administrador(request)
+        if denied is not None:
+            return denied
+
+        qs = (
+            Solicitud.objects.filter(estado=Solicitud.Estado.PENDIENTE)
+            .values(
+                "ubicacion__codigo_ubicacion",
+                "ubicacion__latitud_e6",
+                "ubicacion__longitud_e6",
+            )
+            .annotate(total=Count("codigo_solicitud"), last=Max("fecha_solicitud"))
+            .order_by("-total", "-last")
+        )
+
+        results = [
+            {
+                "codigo_ubicacion": row["ubicacion__codigo_ubicacion"],
+                "latitud": format_coord(row["ubicacion__latitud_e6"]),
+                "longitud": format_coord(row["ubicacion__longitud_e6"]),
+                "total": row["total"],
+                "ultima": row["last"],
+            }
+            async for row in qs
+        ]
+        return json_response(results)
+
+
+class EventStreamView(View):
+    """Stream SSE de cambios: GET /api/events/?topics=dispensers,solicitudes.
+
+    Reanuda desde Last-Event-ID (o ?last_event_id=) si el evento sigue en el
+    buffer; si no, envía `resync` y el cliente vuelve a pedir la lista.
+    Requiere servidor ASGI: bajo WSGI cada conexión ocuparía un worker.
+    """
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return json_response({"detail": "El stream de eventos requiere un servidor ASGI."}, status=503)
+
+        topics = {t.strip() for t in request.GET.get("topics", events.TOPIC_DISPENSERS).split(",") if t.strip()}
+        if not topics or not topics <= events.TOPICS:
+            return json_response({"detail": f"topics inválidos; opciones: {', '.join(sorted(events.TOPICS))}"}, status=400)
+        if topics & events.ADMIN_TOPICS:
+            denied = await require_administrador(request)
+            if denied is not None:
+                return denied
+
+        last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+        response = StreamingHttpResponse(core_events.stream(topics, last_event_id), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Evita que nginx acumule el stream.
+        response["X-Accel-Buffering"] = "no"
+        return response
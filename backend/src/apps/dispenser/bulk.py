@@ -0,0 +1,360 @@
+"""Importación y exportación masiva del catálogo de dispensers (CSV / GeoJSON).
+
+La importación lee el archivo de forma incremental y trabaja por lotes: valida
+las filas, hace upsert de las Ubicacion del lote con un bulk_create, crea los
+Dispenser y sus imágenes con bulk_create y acumula un reporte de errores por
+fila; un archivo dañado no deja la importación a medias.
+
+La exportación es un generador async para StreamingHttpResponse: el
+servidor es ASGI y un generador síncrono se consumiría entero en memoria
+antes de enviarse. Recorre la base con iterator() y trae cada bloque con
+sync_to_async, sin cargar el catálogo completo.
+
+CSV: columnas nombre_dispenser, latitud, longitud, estado, permanencia,
+imagenes (rutas relativas a MEDIA_ROOT separadas por "|"; tienen que existir).
+GeoJSON: FeatureCollection de Points con esas mismas propiedades.
+"""
+import csv
+import io
+import itertools
+import json
+import posixpath
+
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+
+from core.coords import format_coord, normalize_coords, to_degrees
+from core.models import Imagen, Ubicacion
+from .models import Dispenser, DispenserImagen
+from .signals import dispensers_changed
+
+BATCH_SIZE = 500
+CHUNK_SIZE = 64 * 1024
+EXPORT_CHUNK_SIZE = 2000
+
+CSV_FIELDS = ["codigo_dispenser", "nombre_dispenser", "latitud", "longitud", "estado", "permanencia", "imagenes"]
+TRUE_VALUES = {"1", "true", "t", "si", "sí", "s", "yes", "y"}
+FALSE_VALUES = {"0", "false", "f", "no", "n", ""}
+
+
+class RowError(ValueError):
+    pass
+
+
+# --- Lectura incremental -------------------------------------------------
+
+
+def iter_csv_rows(file_obj):
+    """(número de fila, dict) por cada fila del CSV, leyendo de a líneas."""
+    reader = csv.DictReader(io.TextIOWrapper(file_obj, encoding="utf-8-sig", newline=""))
+    for number, row in enumerate(reader, start=2):
+        imagenes = row.get("imagenes") or ""
+        yield number, {
+            "nombre_dispenser": row.get("nombre_dispenser"),
+            "latitud": row.get("latitud"),
+            "longitud": row.get("longitud"),
+            "estado": row.get("estado"),
+            "permanencia": row.get("permanencia"),
+            "imagenes": [ruta for ruta in imagenes.split("|") if ruta.strip()],
+        }
+
+
+def _iter_json_array_items(file_obj, key: str):
+    """Objetos del array `key` decodificados de a uno, leyendo por bloques.
+
+    Busca la primera aparición de `"key"` seguida de `[`; alcanza para los
+    FeatureCollection habituales sin depender de un parser JSON streaming.
+    """
+    decoder = json.JSONDecoder()
+    reader = io.TextIOWrapper(file_obj, encoding="utf-8-sig")
+    buffer = ""
+    marker = f'"{key}"'
+    pos = -1
+
+    # Avanza hasta el "[" del array.
+    while True:
+        chunk = reader.read(CHUNK_SIZE)
+        buffer += chunk
+        pos = buffer.find(marker)
+        if pos >= 0:
+            bracket = buffer.find("[", pos + len(marker))
+            if bracket >= 0:
+                buffer = buffer[bracket + 1 :]
+                break
+        if not chunk:
+            raise RowError(f'No se encontró el array "{key}"')
+
+    eof = False
+    while True:
+        stripped = buffer.lstrip(" \t\r\n,")
+        if stripped.startswith("]"):
+            return
+        if stripped:
+            try:
+                item, end = decoder.raw_decode(stripped)
+            except json.JSONDecodeError:
+                if eof:
+                    raise RowError("GeoJSON inválido o truncado")
+                item = None
+            if item is not None:
+                yield item
+                buffer = stripped[end:]
+                continue
+        elif eof:
+            raise RowError("GeoJSON truncado")
+        chunk = reader.read(CHUNK_SIZE)
+        eof = not chunk
+        buffer = stripped + chunk
+
+
+def iter_geojson_rows(file_obj):
+    """(número de feature, dict) por cada Feature del FeatureCollection."""
+    for number, feature in enumerate(_iter_json_array_items(file_obj, "features"), start=1):
+        properties = (feature or {}).get("properties") or {}
+        geometry = (feature or {}).get("geometry") or {}
+        coordinates = geometry.get("coordinates") if geometry.get("type") == "Point" else None
+        longitud, latitud = (coordinates[:2] if isinstance(coordinates, list) and len(coordinates) >= 2 else (None, None))
+        imagenes = properties.get("imagenes") or []
+        yield number, {
+            "nombre_dispenser": properties.get("nombre_dispenser"),
+            "latitud": latitud,
+            "longitud": longitud,
+            "estado": properties.get("estado"),
+            "permanencia": properties.get("permanencia"),
+            "imagenes": imagenes if isinstance(imagenes, list) else [imagenes],
+        }
+
+
+# --- Validación ------------------------------------------------------------
+
+
+def _parse_bool(value, field: str) -> bool:
+    if value is None or isinstance(value, bool):
+        return bool(value)
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise RowError(f"{field} inválido")
+
+
+def _parse_coord(value, field: str, limit: float) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{field} inválida")
+    if not -limit <= number <= limit:
+        raise RowError(f"{field} fuera de rango")
+    return number
+
+
+def _clean_row(row: dict) -> dict:
+    nombre = (row.get("nombre_dispenser") or "").strip()
+    if not nombre:
+        raise RowError("El nombre es obligatorio")
+    if len(nombre) > 255:
+        raise RowError("El nombre supera los 255 caracteres")
+
+    imagenes = []
+    for ruta in row.get("imagenes") or []:
+        ruta = str(ruta).strip().replace("\\", "/")
+        # Rutas relativas a MEDIA_ROOT, sin salir de la carpeta.
+        if posixpath.isabs(ruta) or ".." in ruta.split("/") or len(ruta) > 500:
+            raise RowError(f"Ruta de imagen inválida: {ruta}")
+        ruta = posixpath.normpath(ruta)
+        if not default_storage.exists(ruta):
+            raise RowError(f"La imagen no existe en MEDIA_ROOT: {ruta}")
+        imagenes.append(ruta)
+
+    return {
+        "nombre_dispenser": nombre,
+        "latitud": _parse_coord(row.get("latitud"), "latitud", 90),
+        "longitud": _parse_coord(row.get("longitud"), "longitud", 180),
+        "estado": _parse_bool(row.get("estado"), "estado"),
+        "permanencia": _parse_bool(row.get("permanencia"), "permanencia"),
+        "imagenes": imagenes,
+    }
+
+
+# --- Importación ---------------------------------------------------------
+
+
+def _upsert_ubicaciones(coords: set) -> dict:
+    """{(lat_e6, lon_e6): codigo_ubicacion} creando las que falten."""
+    Ubicacion.objects.bulk_create(
+        [Ubicacion(latitud_e6=lat, longitud_e6=lon) for lat, lon in coords],
+        ignore_conflicts=True,
+        batch_size=BATCH_SIZE,
+    )
+    lats = {lat for lat, _ in coords}
+    lons = {lon for _, lon in coords}
+    found = Ubicacion.objects.filter(latitud_e6__in=lats, longitud_e6__in=lons).values_list(
+        "latitud_e6", "longitud_e6", "codigo_ubicacion"
+    )
+    return {(lat, lon): codigo for lat, lon, codigo in found if (lat, lon) in coords}
+
+
+def _import_batch(batch: list, report: dict) -> list:
+    """Crea los dispensers válidos del lote; devuelve los códigos creados."""
+    cleaned = []
+    seen = set()
+    for number, row in batch:
+        try:
+            data = _clean_row(row)
+        except RowError as exc:
+            report["errores"].append({"fila": number, "error": str(exc)})
+            continue
+        if data["nombre_dispenser"] in seen:
+            report["errores"].append({"fila": number, "error": "Nombre repetido en el archivo"})
+            continue
+        seen.add(data["nombre_dispenser"])
+        cleaned.append((number, data))
+
+    existing = set(Dispenser.objects.filter(nombre_dispenser__in=seen).values_list("nombre_dispenser", flat=True))
+    valid = []
+    for number, data in cleaned:
+        if data["nombre_dispenser"] in existing:
+            report["errores"].append({"fila": number, "error": "Ya existe un dispenser con ese nombre"})
+        else:
+            valid.append((number, data))
+    if not valid:
+        return []
+
+    lats = normalize_coords([data["latitud"] for _, data in valid])
+    lons = normalize_coords([data["longitud"] for _, data in valid])
+    coords = list(zip(lats.tolist(), lons.tolist()))
+
+    try:
+        with transaction.atomic():
+            ubicaciones = _upsert_ubicaciones(set(coords))
+            dispensers = Dispenser.objects.bulk_create(
+                [
+                    Dispenser(
+                        nombre_dispenser=data["nombre_dispenser"],
+                        estado=data["estado"],
+                        permanencia=data["permanencia"],
+                        ubicacion_id=ubicaciones[coord],
+                    )
+                    for (_, data), coord in zip(valid, coords)
+                ]
+            )
+
+            pairs = [(dispenser, ruta) for dispenser, (_, data) in zip(dispensers, valid) for ruta in data["imagenes"]]
+            imagenes = Imagen.objects.bulk_create([Imagen(ruta_imagen=ruta) for _, ruta in pairs])
+            DispenserImagen.objects.bulk_create(
+                [DispenserImagen(dispenser=dispenser, imagen=imagen) for (dispenser, _), imagen in zip(pairs, imagenes)]
+            )
+    except IntegrityError:
+        # Carrera con otra alta del mismo nombre: el lote entero se descarta.
+        for number, _ in valid:
+            report["errores"].append({"fila": number, "error": "Conflicto al guardar el lote; reintentar"})
+        return []
+
+    report["creados"] += len(dispensers)
+    return [dispenser.codigo_dispenser for dispenser in dispensers]
+
+
+def import_dispensers(rows, batch_size: int = BATCH_SIZE) -> dict:
+    """Importa filas (número, dict) y devuelve {"filas", "creados", "errores", "codigos"}.
+
+    Todo el archivo va en una transacción (cada lote en un savepoint): si el
+    documento está dañado (CSV ilegible, GeoJSON inválido o truncado) no se
+    guarda ninguna fila. Los errores de validación se informan por fila y no
+    cancelan el resto.
+    """
+    report = {"filas": 0, "creados": 0, "errores": [], "codigos": []}
+    rows = iter(rows)
+    try:
+        with transaction.atomic():
+            while batch := list(itertools.islice(rows, batch_size)):
+                report["filas"] += len(batch)
+                report["codigos"].extend(_import_batch(batch, report))
+    except (RowError, UnicodeDecodeError, csv.Error) as exc:
+        report["errores"].append({"fila": None, "error": f"{exc}; no se importó ninguna fila"})
+        report["creados"] = 0
+        report["codigos"] = []
+        return report
+
+    if report["codigos"]:
+        # bulk_create no dispara post_save.
+        dispensers_changed.send(sender=Dispenser, codigos=report["codigos"])
+    return report
+
+
+# --- Exportación ---------------------------------------------------------
+
+
+def _catalogue_rows(using: str):
+    """(dispenser, [rutas]) en orden de código, recorriendo la base por bloques."""
+    rows = (
+        Dispenser.objects.using(using)
+        .order_by("codigo_dispenser", "imagenes__codigo_imagen")
+        .values_list(
+            "codigo_dispenser",
+            "nombre_dispenser",
+            "estado",
+            "permanencia",
+            "ubicacion__latitud_e6",
+            "ubicacion__longitud_e6",
+            "imagenes__ruta_imagen",
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for key, group in itertools.groupby(rows, key=lambda row: row[:6]):
+        yield key, [row[6] for row in group if row[6] is not None]
+
+
+async def _catalogue_batches(using: str):
+    """Bloques de `_catalogue_rows` leídos en el hilo síncrono del request.
+
+    sync_to_async (thread_sensitive) ejecuta cada bloque en el mismo hilo,
+    así el cursor del iterator() se usa siempre desde su conexión.
+    """
+    rows = _catalogue_rows(using)
+    next_batch = sync_to_async(lambda: list(itertools.islice(rows, EXPORT_CHUNK_SIZE)))
+    while batch := await next_batch():
+        yield batch
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+async def export_csv(using: str = "default"):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_FIELDS)
+    async for batch in _catalogue_batches(using):
+        yield "".join(
+            writer.writerow(
+                [codigo, nombre, format_coord(lat), format_coord(lon), str(estado).lower(), str(permanencia).lower(), "|".join(imagenes)]
+            )
+            for (codigo, nombre, estado, permanencia, lat, lon), imagenes in batch
+        )
+
+
+def _feature(codigo, nombre, estado, permanencia, lat, lon, imagenes) -> str:
+    feature = {
+        "type": "Feature",
+        "id": codigo,
+        "geometry": {"type": "Point", "coordinates": [to_degrees(lon), to_degrees(lat)]},
+        "properties": {
+            "codigo_dispenser": codigo,
+            "nombre_dispenser": nombre,
+            "estado": estado,
+            "permanencia": permanencia,
+            "imagenes": imagenes,
+        },
+    }
+    return json.dumps(feature, ensure_ascii=False, separators=(",", ":"))
+
+
+async def export_geojson(using: str = "default"):
+    yield '{"type":"FeatureCollection","features":['
+    separator = ""
+    async for batch in _catalogue_batches(using):
+        yield separator + ",".join(_feature(*key, imagenes) for key, imagenes in batch)
+        separator = ","
+    yield "]}"
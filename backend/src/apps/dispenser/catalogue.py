@@ -0,0 +1,262 @@
+"""Snapshots estáticos del catálogo de dispensers.
+
+Cada publicación genera, bajo MEDIA_ROOT/catalogue/:
+- el catálogo completo (mismo formato que GET /api/dispensers/),
+- un shard por celda de CATALOGUE_SHARD_DEGREES grados con sus dispensers,
+- un manifest.json que apunta a la versión vigente.
+
+Los archivos llevan el hash del contenido en el nombre (son inmutables y se
+pueden cachear para siempre) y se escriben ya comprimidos (.gz y .br) para
+que el servidor estático los entregue sin comprimir en cada request
+(nginx: gzip_static / brotli_static). Así el grueso del tráfico del mapa no
+pasa por Django ni por la base; la API solo sirve el manifest.
+
+Se publica después de cada cambio del catálogo (signals.dispensers_changed),
+con un pequeño retraso que agrupa las ráfagas de cambios en una sola
+publicación, o a mano con `manage.py publish_catalogue` (que el contenedor
+corre al arrancar). Cada worker tiene su propio timer: las publicaciones se
+serializan con un lock de archivo en el directorio del catálogo, y un timer
+cuya ventana ya cubrió otra publicación no vuelve a publicar.
+"""
+import fcntl
+import hashlib
+import itertools
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+from core.compression import brotli, brotli_bytes, gzip_bytes
+from core.coords import to_degrees
+from core.renderers import FastJSONRenderer
+from .models import Dispenser
+
+DIRNAME = "catalogue"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_KEY = "catalogue:manifest"
+LOCK_NAME = ".publish.lock"
+
+
+def _directory() -> str:
+    return os.path.join(settings.MEDIA_ROOT, DIRNAME)
+
+
+def _rows():
+    """Dispensers con el formato de DispenserSerializer, sin instanciar modelos."""
+    rows = (
+        Dispenser.objects.order_by("codigo_dispenser", "imagenes__codigo_imagen")
+        .values_list(
+            "codigo_dispenser",
+            "nombre_dispenser",
+            "estado",
+            "permanencia",
+            "ubicacion__codigo_ubicacion",
+            "ubicacion__longitud_e6",
+            "ubicacion__latitud_e6",
+            "imagenes__codigo_imagen",
+            "imagenes__ruta_imagen",
+        )
+        .iterator(chunk_size=5000)
+    )
+    for key, group in itertools.groupby(rows, key=lambda row: row[:7]):
+        codigo, nombre, estado, permanencia, codigo_ubicacion, longitud_e6, latitud_e6 = key
+        yield latitud_e6, longitud_e6, {
+            "codigo_dispenser": codigo,
+            "nombre_dispenser": nombre,
+            "estado": estado,
+            "permanencia": permanencia,
+            "ubicacion": {
+                "codigo_ubicacion": codigo_ubicacion,
+                "longitud": to_degrees(longitud_e6),
+                "latitud": to_degrees(latitud_e6),
+            },
+            "imagenes": [
+                {"codigo_imagen": row[7], "ruta_imagen": row[8]} for row in group if row[7] is not None
+            ],
+        }
+
+
+def shard_key(latitud_e6: int, longitud_e6: int, degrees: float) -> str:
+    size = degrees * 1_000_000
+    return f"{math.floor(latitud_e6 / size)}_{math.floor(longitud_e6 / size)}"
+
+
+def _write_atomic(path: str, content: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        # mkstemp crea el archivo con 0600 y os.replace lo conserva: el
+        # servidor estático (otro usuario) no podría leerlo.
+        os.fchmod(fd, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _write_snapshot(name: str, content: bytes) -> dict:
+    """Escribe <name>.<hash>.json y sus variantes comprimidas; devuelve su entrada del manifest."""
+    digest = hashlib.sha256(content).hexdigest()
+    filename = f"{name}.{digest[:16]}.json"
+    path = os.path.join(_directory(), filename)
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+
+    # Mismo contenido, mismo nombre: si ya existe no hay nada que escribir.
+    if not os.path.exists(path):
+        _write_atomic(path + ".gz", gzip_bytes(content, 9))
+        if brotli is not None:
+            _write_atomic(path + ".br", brotli_bytes(content, 11))
+        _write_atomic(path, content)
+    return {"path": f"{DIRNAME}/{filename}", "sha256": digest, "bytes": len(content), "encodings": encodings}
+
+
+def _prune(keep: set[str]) -> None:
+    """Borra snapshots viejos que el manifest vigente ya no usa.
+
+    Se conservan CATALOGUE_RETENTION_SECONDS para los clientes que todavía
+    tengan el manifest anterior.
+    """
+    cutoff = time.time() - settings.CATALOGUE_RETENTION_SECONDS
+    with os.scandir(_directory()) as it:
+        for entry in it:
+            base = entry.name.removesuffix(".gz").removesuffix(".br")
+            if entry.name in (MANIFEST_NAME, LOCK_NAME) or f"{DIRNAME}/{base}" in keep:
+                continue
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+
+
+@contextmanager
+def _publish_lock():
+    """Lock exclusivo entre procesos; el archivo guarda cuándo empezó la última publicación."""
+    os.makedirs(_directory(), exist_ok=True)
+    with open(os.path.join(_directory(), LOCK_NAME), "a+") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield fh
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _manifest_path() -> str:
+    return os.path.join(_directory(), MANIFEST_NAME)
+
+
+def _cache_manifest(manifest: dict) -> None:
+    cache.set(MANIFEST_KEY, (os.stat(_manifest_path()).st_mtime_ns, manifest), None)
+
+
+def _publish() -> dict:
+    renderer = FastJSONRenderer()
+    degrees = settings.CATALOGUE_SHARD_DEGREES
+
+    catalogue = []
+    shards = {}
+    for latitud_e6, longitud_e6, item in _rows():
+        catalogue.append(item)
+        shards.setdefault(shard_key(latitud_e6, longitud_e6, degrees), []).append(item)
+
+    full = _write_snapshot("dispensers", renderer.render(catalogue))
+    shard_entries = {}
+    for key, items in sorted(shards.items()):
+        lat_index, lon_index = (int(part) for part in key.split("_"))
+        entry = _write_snapshot(f"shard.{key}", renderer.render(items))
+        entry["count"] = len(items)
+        entry["bbox"] = [lon_index * degrees, lat_index * degrees, (lon_index + 1) * degrees, (lat_index + 1) * degrees]
+        shard_entries[key] = entry
+
+    manifest = {
+        "version": full["sha256"][:16],
+        "generated_at": timezone.now(),
+        "count": len(catalogue),
+        "shard_degrees": degrees,
+        "full": full,
+        "shards": shard_entries,
+    }
+    _write_atomic(_manifest_path(), renderer.render(manifest))
+    _cache_manifest(manifest)
+    _prune({full["path"], *(entry["path"] for entry in shard_entries.values())})
+    return manifest
+
+
+def publish(since: float | None = None) -> dict | None:
+    """Renderiza el catálogo y los shards, escribe los archivos y actualiza el manifest.
+
+    Con `since` (cuándo se pidió la publicación) no hace nada si otra
+    publicación empezó después: ya leyó esos cambios. Devuelve None en ese caso.
+    """
+    with _publish_lock() as lock:
+        lock.seek(0)
+        last = float(lock.read() or 0)
+        if since is not None and last >= since:
+            return None
+        started = time.time()
+        manifest = _publish()
+        lock.seek(0)
+        lock.truncate()
+        lock.write(repr(started))
+    return manifest
+
+
+def get_manifest() -> dict | None:
+    """Manifest vigente, o None si todavía no se publicó.
+
+    El cache se valida contra el mtime del archivo: cada worker (o cada
+    cache local) ve la publicación de otro en el request siguiente.
+    """
+    try:
+        mtime = os.stat(_manifest_path()).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = cache.get(MANIFEST_KEY)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(_manifest_path(), "rb") as fh:
+            manifest = json.load(fh)
+    except FileNotFoundError:
+        return None
+    cache.set(MANIFEST_KEY, (mtime, manifest), None)
+    return manifest
+
+
+_timer_lock = threading.Lock()
+_timer: threading.Timer | None = None
+_requested_at = 0.0
+
+
+def _run_scheduled() -> None:
+    global _timer
+    with _timer_lock:
+        _timer = None
+        since = _requested_at
+    try:
+        publish(since=since)
+    finally:
+        # Hilo propio: sus conexiones no las cierra el ciclo de request.
+        connections.close_all()
+
+
+def schedule_publish() -> None:
+    """Publica dentro de CATALOGUE_PUBLISH_DELAY segundos; los cambios de la ventana se agrupan."""
+    global _timer, _requested_at
+    delay = settings.CATALOGUE_PUBLISH_DELAY
+    if delay <= 0:
+        publish()
+        return
+    with _timer_lock:
+        # El último cambio de la ventana: una publicación que empezó antes no lo incluye.
+        _requested_at = time.time()
+        if _timer is None:
+            _timer = threading.Timer(delay, _run_scheduled)
+            _timer.daemon = True
+            _timer.start()
@@ -0,0 +1,218 @@
+"""Clustering de demanda para recomendar dónde poner dispensers.
+
+Las solicitudes se normalizan a 4 decimales (~11 m), así que pedidos hechos a
+pocos metros caen en ubicaciones distintas y el resumen subestima los focos
+reales. Acá se agrupan con un DBSCAN aproximado sobre grilla, vectorizado
+con NumPy:
+
+1. Se proyectan las coordenadas a metros (equirectangular, válido a escala
+   de ciudad) y se asigna cada punto a una celda de lado `eps`.
+2. Una celda es "core" si el peso de su vecindario 3x3 (que cubre la bola de
+   radio `eps` de sus puntos) llega a `min_weight`.
+3. Las celdas core vecinas se unen en componentes conexas (propagación de
+   etiquetas con pointer jumping); las celdas no core pegadas a un core son
+   borde de ese cluster y el resto es ruido.
+
+Después cada cluster se rankea por demanda, descontando la que ya cubre un
+dispenser existente a menos de `coverage_radius` metros.
+"""
+import numpy as np
+
+EARTH_RADIUS_M = 6_371_008.8
+
+# Vecinos en la grilla: todos (para vecindarios) y la mitad (para aristas sin duplicar).
+NEIGHBOR_OFFSETS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+HALF_OFFSETS = [(1, -1), (1, 0), (1, 1), (0, 1)]
+
+
+class Projection:
+    """Proyección equirectangular centrada en `lat0` (microgrados -> metros)."""
+
+    def __init__(self, lat0_e6: float):
+        self.scale = np.pi / 180 / 1e6 * EARTH_RADIUS_M
+        self.cos_lat0 = np.cos(np.radians(lat0_e6 / 1e6))
+
+    def to_meters(self, lats_e6, lons_e6):
+        lats_e6 = np.asarray(lats_e6, dtype=np.float64)
+        lons_e6 = np.asarray(lons_e6, dtype=np.float64)
+        return lons_e6 * self.scale * self.cos_lat0, lats_e6 * self.scale
+
+    def to_microdegrees(self, x, y):
+        return y / self.scale, x / (self.scale * self.cos_lat0)
+
+
+def _neighbor_index(keys, cx, cy, dx, dy, width):
+    """Índice de la celda vecina (cx+dx, cy+dy) en `keys`, o -1 si está vacía."""
+    target = (cx + dx) * width + (cy + dy)
+    idx = np.searchsorted(keys, target)
+    idx[idx == len(keys)] = 0
+    return np.where(keys[idx] == target, idx, -1)
+
+
+def _connected_components(n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    labels = np.arange(n)
+    if not len(a):
+        return labels
+    while True:
+        previous = labels.copy()
+        np.minimum.at(labels, a, labels[b])
+        np.minimum.at(labels, b, labels[a])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def grid_dbscan(x, y, weights, eps: float, min_weight: float) -> np.ndarray:
+    """Etiqueta de cluster por punto (0..k-1) o -1 para ruido."""
+    if not len(x):
+        return np.empty(0, dtype=np.int64)
+
+    gx = np.floor(x / eps).astype(np.int64)
+    gy = np.floor(y / eps).astype(np.int64)
+    gx -= gx.min() - 1
+    gy -= gy.min() - 1
+    width = int(gy.max()) + 2
+    keys, point_cell = np.unique(gx * width + gy, return_inverse=True)
+    cx, cy = keys // width, keys % width
+    cell_weight = np.bincount(point_cell, weights=weights, minlength=len(keys))
+
+    neighbors = [_neighbor_index(keys, cx, cy, dx, dy, width) for dx, dy in NEIGHBOR_OFFSETS]
+    neighborhood = np.zeros(len(keys))
+    for idx in neighbors:
+        found = idx >= 0
+        neighborhood[found] += cell_weight[idx[found]]
+    core = neighborhood >= min_weight
+
+    edges_a, edges_b = [], []
+    for dx, dy in HALF_OFFSETS:
+        idx = _neighbor_index(keys, cx, cy, dx, dy, width)
+        linked = core & (idx >= 0)
+        linked[linked] = core[idx[linked]]
+        edges_a.append(np.flatnonzero(linked))
+        edges_b.append(idx[linked])
+    roots = _connected_components(len(keys), np.concatenate(edges_a), np.concatenate(edges_b))
+
+    cell_label = np.where(core, roots, -1)
+    for idx in neighbors:
+        # Borde: celda no core con algún vecino core.
+        border = (cell_label == -1) & (idx >= 0)
+        border[border] = core[idx[border]]
+        cell_label[border] = roots[idx[border]]
+
+    clustered = cell_label >= 0
+    _, compact = np.unique(cell_label[clustered], return_inverse=True)
+    cell_label[clustered] = compact
+    return cell_label[point_cell]
+
+
+def _nearest_distances(x, y, targets_x, targets_y, chunk: int = 2048) -> np.ndarray:
+    """Distancia exacta al objetivo más cercano (fuerza bruta por bloques)."""
+    if not len(targets_x):
+        return np.full(len(x), np.inf)
+    result = np.empty(len(x))
+    for start in range(0, len(x), chunk):
+        stop = start + chunk
+        dx = x[start:stop, None] - targets_x[None, :]
+        dy = y[start:stop, None] - targets_y[None, :]
+        result[start:stop] = np.sqrt((dx * dx + dy * dy).min(axis=1))
+    return result
+
+
+def _nearest_within(x, y, targets_x, targets_y, radius: float) -> np.ndarray:
+    """Distancia al objetivo más cercano si está a menos de `radius`, si no inf.
+
+    Usa una grilla de lado `radius`: solo compara contra los objetivos de las
+    9 celdas vecinas, así el costo depende de la densidad y no de N x M.
+    """
+    result = np.full(len(x), np.inf)
+    if not len(x) or not len(targets_x):
+        return result
+
+    gx, gy = np.floor(x / radius).astype(np.int64), np.floor(y / radius).astype(np.int64)
+    tgx, tgy = np.floor(targets_x / radius).astype(np.int64), np.floor(targets_y / radius).astype(np.int64)
+    x0 = min(gx.min(), tgx.min()) - 1
+    y0 = min(gy.min(), tgy.min()) - 1
+    width = int(max(gy.max(), tgy.max()) - y0) + 2
+
+    target_keys = (tgx - x0) * width + (tgy - y0)
+    order = np.argsort(target_keys)
+    target_keys, targets_x, targets_y = target_keys[order], targets_x[order], targets_y[order]
+
+    for dx, dy in NEIGHBOR_OFFSETS:
+        keys = (gx - x0 + dx) * width + (gy - y0 + dy)
+        lo = np.searchsorted(target_keys, keys, side="left")
+        counts = np.searchsorted(target_keys, keys, side="right") - lo
+        if not counts.any():
+            continue
+        # Expande cada punto contra todos los objetivos de esa celda vecina.
+        source = np.repeat(np.arange(len(x)), counts)
+        target = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(lo, counts)
+        distance = np.hypot(x[source] - targets_x[target], y[source] - targets_y[target])
+        np.minimum.at(result, source, distance)
+
+    # Más allá de `radius` puede haber uno más cerca fuera de las 9 celdas.
+    result[result > radius] = np.inf
+    return result
+
+
+def rank_sites(
+    lats_e6,
+    lons_e6,
+    weights,
+    dispenser_lats_e6,
+    dispenser_lons_e6,
+    eps: float = 30.0,
+    min_weight: float = 3,
+    coverage_radius: float = 500.0,
+    limit: int | None = None,
+) -> dict:
+    """Agrupa la demanda y rankea los clusters como sitios candidatos.
+
+    Devuelve arrays paralelos ordenados por `score` descendente:
+    lat_e6/lon_e6 (centroide ponderado), weight, members (puntos del
+    cluster), representative (índice del punto de más demanda),
+    distance (metros al dispenser más cercano) y score. Con `limit` solo se
+    devuelven los primeros.
+    """
+    lats_e6 = np.asarray(lats_e6, dtype=np.int64)
+    lons_e6 = np.asarray(lons_e6, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+    if not len(lats_e6):
+        empty = np.empty(0)
+        return {key: empty for key in ("lat_e6", "lon_e6", "weight", "members", "representative", "distance", "score")}
+
+    projection = Projection(float(np.average(lats_e6, weights=weights)))
+    x, y = projection.to_meters(lats_e6, lons_e6)
+    labels = grid_dbscan(x, y, weights, eps, min_weight)
+
+    clustered = np.flatnonzero(labels >= 0)
+    cluster = labels[clustered]
+    k = int(cluster.max()) + 1 if len(cluster) else 0
+    w = weights[clustered]
+    total = np.bincount(cluster, weights=w, minlength=k)
+    center_x = np.bincount(cluster, weights=w * x[clustered], minlength=k) / np.maximum(total, 1e-12)
+    center_y = np.bincount(cluster, weights=w * y[clustered], minlength=k) / np.maximum(total, 1e-12)
+    members = np.bincount(cluster, minlength=k)
+
+    # Punto de más demanda de cada cluster: último tras ordenar por (cluster, peso).
+    order = np.lexsort((w, cluster))
+    last_of_cluster = np.flatnonzero(np.diff(cluster[order], append=k))
+    representative = clustered[order[last_of_cluster]]
+
+    # Para el score solo importa la distancia hasta `coverage_radius`; la
+    # distancia exacta se calcula después únicamente para los devueltos.
+    dispenser_x, dispenser_y = projection.to_meters(dispenser_lats_e6, dispenser_lons_e6)
+    covered = _nearest_within(center_x, center_y, dispenser_x, dispenser_y, coverage_radius)
+    score = total * np.minimum(1.0, covered / coverage_radius)
+
+    ranking = np.argsort(-score, kind="stable")[:limit]
+    lat_e6, lon_e6 = projection.to_microdegrees(center_x[ranking], center_y[ranking])
+    return {
+        "lat_e6": np.rint(lat_e6).astype(np.int64),
+        "lon_e6": np.rint(lon_e6).astype(np.int64),
+        "weight": total[ranking],
+        "members": members[ranking],
+        "representative": representative[ranking],
+        "distance": _nearest_distances(center_x[ranking], center_y[ranking], dispenser_x, dispenser_y),
+        "score": score[ranking],
+    }
@@ -0,0 +1,69 @@
+"""Eventos SSE de dispensers y solicitudes (ver core.events).
+
+Se publican con transaction.on_commit para que ningún cliente vea un cambio
+que después se revierte.
+
+Topics y eventos:
+- dispensers: dispenser.created / dispenser.updated {"dispensers": [...]},
+  dispenser.state {"codigos", "estado"?, "permanencia"?},
+  dispenser.deleted {"codigos"}.
+- solicitudes (solo administradores): solicitud.created {ubicación},
+  solicitud.accepted {"codigo_ubicacion", "codigo_dispenser"}.
+"""
+from django.db import transaction
+
+from core import events
+from core.coords import format_coord
+from .models import Dispenser
+from .serializers import DispenserSerializer
+
+TOPIC_DISPENSERS = "dispensers"
+TOPIC_SOLICITUDES = "solicitudes"
+TOPICS = {TOPIC_DISPENSERS, TOPIC_SOLICITUDES}
+ADMIN_TOPICS = {TOPIC_SOLICITUDES}
+
+# Altas masivas: se parten en varios eventos para no armar frames enormes.
+CHUNK_SIZE = 500
+
+
+def _publish_saved(name: str, codigos: list[int]) -> None:
+    for start in range(0, len(codigos), CHUNK_SIZE):
+        qs = (
+            Dispenser.objects.filter(codigo_dispenser__in=codigos[start : start + CHUNK_SIZE])
+            .select_related("ubicacion")
+            .prefetch_related("imagenes")
+            .order_by("codigo_dispenser")
+        )
+        events.publish(TOPIC_DISPENSERS, name, {"dispensers": DispenserSerializer(qs, many=True).data})
+
+
+def dispensers_created(codigos: list[int]) -> None:
+    transaction.on_commit(lambda: _publish_saved("dispenser.created", codigos))
+
+
+def dispensers_updated(codigos: list[int]) -> None:
+    transaction.on_commit(lambda: _publish_saved("dispenser.updated", codigos))
+
+
+def dispensers_state_changed(codigos: list[int], fields: dict) -> None:
+    data = {"codigos": codigos, **fields}
+    transaction.on_commit(lambda: events.publish(TOPIC_DISPENSERS, "dispenser.state", data))
+
+
+def dispensers_deleted(codigos: list[int]) -> None:
+    data = {"codigos": codigos}
+    transaction.on_commit(lambda: events.publish(TOPIC_DISPENSERS, "dispenser.deleted", data))
+
+
+def solicitud_created(ubicacion) -> None:
+    data = {
+        "codigo_ubicacion": ubicacion.codigo_ubicacion,
+        "latitud": format_coord(ubicacion.latitud_e6),
+        "longitud": format_coord(ubicacion.longitud_e6),
+    }
+    transaction.on_commit(lambda: events.publish(TOPIC_SOLICITUDES, "solicitud.created", data))
+
+
+def solicitudes_accepted(codigo_ubicacion: int, codigo_dispenser: int) -> None:
+    data = {"codigo_ubicacion": codigo_ubicacion, "codigo_dispenser": codigo_dispenser}
+    transaction.on_commit(lambda: events.publish(TOPIC_SOLICITUDES, "solicitud.accepted", data))
@@ -0,0 +1,179 @@
+"""Heatmap de demanda (solicitudes pendientes) precalculado por nivel de zoom.
+
+El raster cubre el bounding box de la demanda pendiente (con margen) y se
+divide en una grilla de 2**z x 2**z celdas para cada zoom z. Se arma el
+nivel más fino con NumPy y los demás sumando bloques de 2x2, y se guarda
+cada nivel en el cache.
+
+Las solicitudes nuevas no tocan el cache: al leer se buscan en la base las
+pendientes posteriores al build (rango de codigo_solicitud, con el índice
+de la PK) y se suman a la grilla. La base es la fuente de verdad, así que
+no hay contadores que el cache pueda desalojar. Si hay más de
+HEATMAP_MAX_PENDING nuevas, si alguna cae fuera del bounding box o al
+aceptar solicitudes, el raster se reconstruye.
+
+El build lee todo desde un mismo snapshot y guarda el último código que
+contó (`seq`) y los códigos contados de la ventana RECENT_WINDOW anterior.
+Una solicitud con código menor que `seq` que confirma tarde no estaba en
+el snapshot: cae en esa ventana y se suma al leer, sin contarse dos veces.
+
+Filas = latitud (fila 0 al sur), columnas = longitud (columna 0 al oeste).
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.db.models import Count, Max
+
+from core.coords import to_degrees
+from .models import Solicitud
+
+MAX_ZOOM = 9
+META_KEY = "heatmap:meta"
+LEVEL_KEY = "heatmap:z%d"
+# Códigos anteriores a `seq` que todavía pueden confirmar después del build.
+RECENT_WINDOW = 1000
+
+# Margen alrededor de la demanda para que las solicitudes nuevas cercanas
+# se puedan sumar de forma incremental. En microgrados.
+MIN_PADDING = 10_000
+
+
+def _bounds(lats: np.ndarray, lons: np.ndarray) -> tuple[int, int, int, int]:
+    def padded(values):
+        low, high = int(values.min()), int(values.max())
+        pad = max(MIN_PADDING, (high - low) // 10)
+        return low - pad, high + pad + 1
+
+    lat_min, lat_max = padded(lats)
+    lon_min, lon_max = padded(lons)
+    return lat_min, lat_max, lon_min, lon_max
+
+
+def _cell_indices(lats, lons, bounds, size: int):
+    # Aritmética entera: el build y las actualizaciones incrementales caen
+    # exactamente en la misma celda.
+    lat_min, lat_max, lon_min, lon_max = bounds
+    rows = (lats - lat_min) * size // (lat_max - lat_min)
+    cols = (lons - lon_min) * size // (lon_max - lon_min)
+    return rows, cols
+
+
+def _downsample(grid: np.ndarray) -> np.ndarray:
+    half = grid.shape[0] // 2
+    return grid.reshape(half, 2, half, 2).sum(axis=(1, 3))
+
+
+def _pending_queryset(using: str):
+    return Solicitud.objects.using(using).filter(estado=Solicitud.Estado.PENDIENTE)
+
+
+def build() -> dict:
+    """Recalcula todos los niveles desde la base y los guarda en el cache."""
+    using = router.db_for_read(Solicitud)
+    connection = connections[using]
+    own_transaction = not connection.in_atomic_block
+    with transaction.atomic(using=using):
+        if own_transaction and connection.vendor == "postgresql":
+            # Las tres consultas tienen que ver el mismo snapshot.
+            connection.cursor().execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        pending = _pending_queryset(using)
+        seq = pending.aggregate(seq=Max("codigo_solicitud"))["seq"] or 0
+        rows = list(
+            pending.filter(codigo_solicitud__lte=seq)
+            .values_list("ubicacion__latitud_e6", "ubicacion__longitud_e6")
+            .annotate(total=Count("codigo_solicitud"))
+            .order_by()
+        )
+        recent = list(pending.filter(codigo_solicitud__gt=seq - RECENT_WINDOW).values_list("codigo_solicitud", flat=True))
+    data = np.array(rows, dtype=np.int64).reshape(-1, 3)
+    ttl = settings.HEATMAP_CACHE_TTL
+
+    if not len(data):
+        meta = {"bounds": None, "seq": seq, "recent": recent}
+        cache.set(META_KEY, meta, ttl)
+        return meta
+
+    lats, lons, totals = data[:, 0], data[:, 1], data[:, 2]
+    bounds = _bounds(lats, lons)
+    size = 2**MAX_ZOOM
+    cell_rows, cell_cols = _cell_indices(lats, lons, bounds, size)
+    grid = np.bincount(cell_rows * size + cell_cols, weights=totals, minlength=size * size)
+    grid = grid.astype(np.int32).reshape(size, size)
+
+    levels = {MAX_ZOOM: grid}
+    for zoom in range(MAX_ZOOM - 1, -1, -1):
+        levels[zoom] = _downsample(levels[zoom + 1])
+
+    meta = {"bounds": bounds, "seq": seq, "recent": recent}
+    cache.set_many({LEVEL_KEY % zoom: level for zoom, level in levels.items()}, ttl)
+    cache.set(META_KEY, meta, ttl)
+    return meta
+
+
+def _pending(meta: dict) -> np.ndarray | None:
+    """Celdas (fila, columna) del nivel más fino de las solicitudes que el build no contó.
+
+    None si hay que reconstruir: demasiadas nuevas o alguna fuera del bounding box.
+    """
+    bounds = meta["bounds"]
+    counted = set(meta["recent"])
+    rows = (
+        _pending_queryset(router.db_for_read(Solicitud))
+        .filter(codigo_solicitud__gt=meta["seq"] - RECENT_WINDOW)
+        .order_by("codigo_solicitud")
+        .values_list("codigo_solicitud", "ubicacion__latitud_e6", "ubicacion__longitud_e6")
+    )[: len(counted) + settings.HEATMAP_MAX_PENDING + 1]
+    new = np.array([(lat, lon) for codigo, lat, lon in rows if codigo not in counted], dtype=np.int64).reshape(-1, 2)
+    if len(new) > settings.HEATMAP_MAX_PENDING:
+        return None
+    if not len(new):
+        return new
+    if bounds is None:
+        return None
+    lats, lons = new[:, 0], new[:, 1]
+    if not ((lats >= bounds[0]) & (lats < bounds[1]) & (lons >= bounds[2]) & (lons < bounds[3])).all():
+        return None
+    return np.column_stack(_cell_indices(lats, lons, bounds, 2**MAX_ZOOM))
+
+
+def get_level(zoom: int) -> tuple[tuple | None, np.ndarray | None]:
+    """Devuelve (bounds, grilla) para un zoom, reconstruyendo si hace falta."""
+    meta = cache.get(META_KEY)
+    grid = cache.get(LEVEL_KEY % zoom) if meta else None
+    pending = _pending(meta) if meta else None
+    if meta is None or pending is None or (meta["bounds"] is not None and grid is None):
+        meta = build()
+        grid = cache.get(LEVEL_KEY % zoom)
+        pending = None
+    if pending is not None and len(pending):
+        # La celda del zoom z es la del nivel más fino dividida por 2**(MAX_ZOOM - z).
+        shift = MAX_ZOOM - zoom
+        np.add.at(grid, (pending[:, 0] >> shift, pending[:, 1] >> shift), 1)
+    return meta["bounds"], grid
+
+
+def invalidate() -> None:
+    cache.delete(META_KEY)
+
+
+def serialize(zoom: int, bounds, grid) -> dict:
+    """Formato disperso: solo las celdas con demanda, como [fila, columna, total]."""
+    size = 2**zoom
+    if bounds is None:
+        return {"zoom": zoom, "size": size, "bounds": None, "max": 0, "cells": []}
+    cell_rows, cell_cols = np.nonzero(grid)
+    counts = grid[cell_rows, cell_cols]
+    lat_min, lat_max, lon_min, lon_max = bounds
+    return {
+        "zoom": zoom,
+        "size": size,
+        "bounds": {
+            "lat_min": to_degrees(lat_min),
+            "lat_max": to_degrees(lat_max),
+            "lon_min": to_degrees(lon_min),
+            "lon_max": to_degrees(lon_max),
+        },
+        "max": int(counts.max()) if len(counts) else 0,
+        "cells": np.column_stack((cell_rows, cell_cols, counts)).tolist(),
+    }
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from dispenser.models import Solicitud, SolicitudArchivada
+
+FIELDS = [
+    "codigo_solicitud",
+    "fecha_solicitud",
+    "estado",
+    "aceptada_en",
+    "aceptada_por_id",
+    "user_id",
+    "dispenser_id",
+    "ubicacion_id",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve a SolicitudArchivada las solicitudes aceptadas hace más de --dias días, "
+        "por lotes. Se puede cortar y volver a correr: cada lote es una transacción."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=settings.SOLICITUD_ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--max-batches", type=int, default=None, help="Corta después de N lotes.")
+        parser.add_argument("--dry-run", action="store_true", help="Solo informa cuántas se archivarían.")
+
+    def handle(self, *args, dias, batch_size, max_batches, dry_run, **options):
+        if dias < 0 or batch_size < 1:
+            raise CommandError("--dias debe ser >= 0 y --batch-size >= 1")
+
+        cutoff = timezone.now() - timedelta(days=dias)
+        candidates = Solicitud.objects.filter(
+            Q(aceptada_en__lt=cutoff) | Q(aceptada_en__isnull=True),
+            estado=Solicitud.Estado.ACEPTADA,
+        )
+        if dry_run:
+            self.stdout.write(f"{candidates.count()} solicitudes aceptadas antes de {cutoff:%Y-%m-%d} para archivar")
+            return
+
+        moved = batches = 0
+        while max_batches is None or batches < max_batches:
+            with transaction.atomic():
+                # Recorre el índice parcial de aceptadas; skip_locked permite
+                # correr dos instancias sin que se pisen (en PostgreSQL).
+                rows = list(
+                    candidates.order_by("aceptada_en", "codigo_solicitud")
+                    .select_for_update(skip_locked=True)
+                    .values(*FIELDS)[:batch_size]
+                )
+                if not rows:
+                    break
+                SolicitudArchivada.objects.bulk_create(
+                    [SolicitudArchivada(**row) for row in rows],
+                    ignore_conflicts=True,
+                )
+                Solicitud.objects.filter(codigo_solicitud__in=[row["codigo_solicitud"] for row in rows]).delete()
+
+            moved += len(rows)
+            batches += 1
+            self.stdout.write(f"lote {batches}: {len(rows)} archivadas (total {moved})")
+
+        self.stdout.write(self.style.SUCCESS(f"{moved} solicitudes archivadas en {batches} lotes"))
@@ -0,0 +1,134 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+
+from core.models import Imagen
+from dispenser.models import DispenserImagen
+
+
+def _walk(root: str, rel: str = "", start_after: str = ""):
+    """Archivos bajo root/rel como (ruta relativa, stat), en orden lexicográfico.
+
+    Usa os.scandir sin armar la lista completa del árbol. Las carpetas se
+    ordenan con "/" al final del nombre para que el recorrido coincida con el
+    orden de las rutas y se pueda reanudar después de `start_after`.
+    """
+    with os.scandir(os.path.join(root, rel)) as it:
+        entries = sorted(it, key=lambda e: e.name + ("/" if e.is_dir(follow_symlinks=False) else ""))
+    for entry in entries:
+        if entry.name.startswith("."):
+            continue
+        path = f"{rel}/{entry.name}" if rel else entry.name
+        if entry.is_dir(follow_symlinks=False):
+            if path + "/" < start_after and not start_after.startswith(path + "/"):
+                continue
+            yield from _walk(root, path, start_after)
+        elif entry.is_file(follow_symlinks=False) and path > start_after:
+            yield path, entry.stat(follow_symlinks=False)
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra filas de Imagen sin dispenser y archivos de MEDIA_ROOT/<prefix> que ninguna "
+        "Imagen referencia. Trabaja por lotes; con --state-file se puede cortar y reanudar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Solo informa, no borra nada.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--prefix", default="dispensers", help="Carpeta de MEDIA_ROOT a recorrer.")
+        parser.add_argument(
+            "--grace-minutes",
+            type=int,
+            default=60,
+            help="No toca archivos más nuevos: pueden ser subidas cuya Imagen todavía no se creó.",
+        )
+        parser.add_argument("--state-file", help="Guarda el avance del recorrido de archivos para reanudar.")
+        parser.add_argument("--skip-rows", action="store_true", help="No borra filas de Imagen huérfanas.")
+        parser.add_argument("--skip-files", action="store_true", help="No recorre MEDIA_ROOT.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser >= 1")
+        self.dry_run = options["dry_run"]
+        self.batch_size = options["batch_size"]
+        verb = "se borrarían" if self.dry_run else "borradas"
+
+        if not options["skip_rows"]:
+            rows = self.collect_rows()
+            self.stdout.write(f"Imagen huérfanas {verb}: {rows}")
+
+        if not options["skip_files"]:
+            files, reclaimed = self.collect_files(options["prefix"], options["grace_minutes"], options["state_file"])
+            verb = "se borrarían" if self.dry_run else "borrados"
+            self.stdout.write(f"archivos {verb}: {files} ({reclaimed} bytes, {reclaimed / 1024 / 1024:.1f} MiB)")
+
+    def collect_rows(self) -> int:
+        """Filas de Imagen sin DispenserImagen, por lotes de pk creciente."""
+        orphans = Imagen.objects.filter(~Exists(DispenserImagen.objects.filter(imagen=OuterRef("pk"))))
+        total = 0
+        last_pk = 0
+        while True:
+            ids = list(
+                orphans.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[: self.batch_size]
+            )
+            if not ids:
+                return total
+            last_pk = ids[-1]
+            if self.dry_run:
+                total += len(ids)
+                continue
+            # La condición se vuelve a evaluar en el DELETE por si alguna se vinculó recién.
+            deleted, _ = orphans.filter(pk__in=ids).delete()
+            total += deleted
+
+    def collect_files(self, prefix: str, grace_minutes: int, state_file: str | None) -> tuple[int, int]:
+        root = settings.MEDIA_ROOT
+        if not os.path.isdir(os.path.join(root, prefix)):
+            return 0, 0
+
+        start_after = ""
+        if state_file and os.path.exists(state_file):
+            with open(state_file) as fh:
+                start_after = json.load(fh).get("last_path", "")
+            self.stdout.write(f"reanudando después de {start_after}")
+
+        cutoff = time.time() - grace_minutes * 60
+        files = reclaimed = 0
+        chunk = []
+
+        def flush():
+            nonlocal files, reclaimed
+            referenced = set(
+                Imagen.objects.filter(ruta_imagen__in=[path for path, _ in chunk]).values_list("ruta_imagen", flat=True)
+            )
+            for path, stat in chunk:
+                if path in referenced or stat.st_mtime > cutoff:
+                    continue
+                if not self.dry_run:
+                    try:
+                        os.remove(os.path.join(root, path))
+                    except FileNotFoundError:
+                        continue
+                files += 1
+                reclaimed += stat.st_size
+            if state_file and not self.dry_run:
+                with open(state_file, "w") as fh:
+                    json.dump({"last_path": chunk[-1][0]}, fh)
+            chunk.clear()
+
+        for path, stat in _walk(root, prefix.strip("/"), start_after):
+            chunk.append((path, stat))
+            if len(chunk) >= self.batch_size:
+                flush()
+        if chunk:
+            flush()
+
+        if state_file and not self.dry_run and os.path.exists(state_file):
+            # Recorrido completo: la próxima corrida empieza de cero.
+            os.remove(state_file)
+        return files, reclaimed
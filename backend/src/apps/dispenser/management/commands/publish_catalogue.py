@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dispenser import catalogue
+
+
+class Command(BaseCommand):
+    help = "Publica el snapshot estático del catálogo (archivos comprimidos, shards y manifest)."
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        manifest = catalogue.publish()
+        full = manifest["full"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"versión {manifest['version']}: {manifest['count']} dispensers, "
+                f"{len(manifest['shards'])} shards, {full['bytes']} bytes "
+                f"en {time.perf_counter() - start:.2f}s"
+            )
+        )
@@ -0,0 +1,119 @@
+# Estado actual de dispenser en una sola migración, para bases nuevas. Las
+# bases existentes siguen usando las originales (listadas en `replaces`)
+# hasta que se puedan borrar.
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+TRGM_INDEX_NAME = "dispenser_nombre_trgm"
+
+
+def create_trgm_index(apps, schema_editor):
+    # Igual que 0005_dispenser_nombre_trgm: solo en PostgreSQL.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = schema_editor.quote_name(apps.get_model("dispenser", "Dispenser")._meta.db_table)
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX_NAME} ON {table} USING gin (nombre_dispenser gin_trgm_ops)"
+    )
+
+
+def drop_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRGM_INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    replaces = [
+        ('dispenser', '0001_initial'),
+        ('dispenser', '0002_dispenserimagen_alter_dispenser_imagenes_and_more'),
+        ('dispenser', '0002_solicitudes_normalizadas'),
+        ('dispenser', '0003_solicitudes_normalizadas'),
+        ('dispenser', '0004_solicitud_estado_aceptacion'),
+        ('dispenser', '0005_dispenser_nombre_trgm'),
+        ('dispenser', '0006_solicitud_archivada'),
+    ]
+
+    dependencies = [
+        ('core', '0001_squashed_0005_imagen_ruta_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Dispenser',
+            fields=[
+                ('codigo_dispenser', models.BigAutoField(primary_key=True, serialize=False)),
+                ('nombre_dispenser', models.CharField(max_length=255, unique=True)),
+                ('estado', models.BooleanField(default=False)),
+                ('permanencia', models.BooleanField(default=False)),
+                ('ubicacion', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='dispensers', to='core.ubicacion')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DispenserImagen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dispenser', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dispenser.dispenser')),
+                ('imagen', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.imagen')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='dispenser',
+            name='imagenes',
+            field=models.ManyToManyField(blank=True, related_name='dispensers', through='dispenser.DispenserImagen', to='core.imagen'),
+        ),
+        migrations.CreateModel(
+            name='Solicitud',
+            fields=[
+                ('codigo_solicitud', models.BigAutoField(primary_key=True, serialize=False)),
+                ('fecha_solicitud', models.DateTimeField(auto_now_add=True)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('aceptada', 'Aceptada')], default='pendiente', max_length=20)),
+                ('aceptada_en', models.DateTimeField(blank=True, null=True)),
+                ('aceptada_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='solicitudes_aceptadas', to=settings.AUTH_USER_MODEL)),
+                ('dispenser', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='solicitudes', to='dispenser.dispenser')),
+                ('ubicacion', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='solicitudes', to='core.ubicacion')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SolicitudArchivada',
+            fields=[
+                ('codigo_solicitud', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fecha_solicitud', models.DateTimeField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('aceptada', 'Aceptada')], max_length=20)),
+                ('aceptada_en', models.DateTimeField(blank=True, null=True)),
+                ('archivada_en', models.DateTimeField(auto_now_add=True)),
+                ('aceptada_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('dispenser', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='solicitudes_archivadas', to='dispenser.dispenser')),
+                ('ubicacion', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='solicitudes_archivadas', to='core.ubicacion')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_archivadas', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dispenserimagen',
+            constraint=models.UniqueConstraint(fields=('imagen',), name='uniq_dispenserimagen_imagen'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('estado', 'pendiente')), fields=['ubicacion'], name='solicitud_pendiente_ubic_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('estado', 'aceptada')), fields=['aceptada_en'], name='solicitud_aceptada_fecha_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='solicitud',
+            constraint=models.UniqueConstraint(fields=('user', 'ubicacion'), name='uniq_solicitud_user_ubicacion'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitudarchivada',
+            index=models.Index(fields=['user', 'ubicacion'], name='solicitud_arch_user_ubic_idx'),
+        ),
+        migrations.RunPython(create_trgm_index, drop_trgm_index),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+INDEX_NAME = "dispenser_nombre_trgm"
+
+
+def create_trgm_index(apps, schema_editor):
+    # Solo PostgreSQL: en otros motores la búsqueda usa el índice en memoria.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = schema_editor.quote_name(apps.get_model("dispenser", "Dispenser")._meta.db_table)
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON {table} USING gin (nombre_dispenser gin_trgm_ops)"
+    )
+
+
+def drop_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dispenser", "0004_solicitud_estado_aceptacion"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_index, drop_trgm_index),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_ubicacion_microdegrees'),
+        ('dispenser', '0005_dispenser_nombre_trgm'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolicitudArchivada',
+            fields=[
+                ('codigo_solicitud', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fecha_solicitud', models.DateTimeField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('aceptada', 'Aceptada')], max_length=20)),
+                ('aceptada_en', models.DateTimeField(blank=True, null=True)),
+                ('archivada_en', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('estado', 'pendiente')), fields=['ubicacion'], name='solicitud_pendiente_ubic_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('estado', 'aceptada')), fields=['aceptada_en'], name='solicitud_aceptada_fecha_idx'),
+        ),
+        migrations.AddField(
+            model_name='solicitudarchivada',
+            name='aceptada_por',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='solicitudarchivada',
+            name='dispenser',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='solicitudes_archivadas', to='dispenser.dispenser'),
+        ),
+        migrations.AddField(
+            model_name='solicitudarchivada',
+            name='ubicacion',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='solicitudes_archivadas', to='core.ubicacion'),
+        ),
+        migrations.AddField(
+            model_name='solicitudarchivada',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_archivadas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='solicitudarchivada',
+            index=models.Index(fields=['user', 'ubicacion'], name='solicitud_arch_user_ubic_idx'),
+        ),
+    ]
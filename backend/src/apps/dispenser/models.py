@@ -71,3 +71,61 @@ class Solicitud(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["user", "ubicacion"], name="uniq_solicitud_user_ubicacion"),
         ]
+        indexes = [
+            # Índices parciales: la demanda pendiente y los candidatos a archivar
+            # se consultan sin recorrer el histórico.
+            models.Index(
+                fields=["ubicacion"],
+                condition=models.Q(estado="pendiente"),
+                name="solicitud_pendiente_ubic_idx",
+            ),
+            models.Index(
+                fields=["aceptada_en"],
+                condition=models.Q(estado="aceptada"),
+                name="solicitud_aceptada_fecha_idx",
+            ),
+        ]
+
+
+class SolicitudArchivada(models.Model):
+    """Solicitudes aceptadas movidas fuera de Solicitud (ver archive_solicitudes).
+
+    Conserva el código original. La tabla caliente queda con la demanda
+    pendiente y el histórico reciente, y sus índices no crecen para siempre.
+    """
+
+    codigo_solicitud = models.BigIntegerField(primary_key=True)
+    fecha_solicitud = models.DateTimeField()
+    estado = models.CharField(max_length=20, choices=Solicitud.Estado.choices)
+    aceptada_en = models.DateTimeField(null=True, blank=True)
+    aceptada_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    archivada_en = models.DateTimeField(auto_now_add=True)
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="solicitudes_archivadas",
+    )
+    dispenser = models.ForeignKey(
+        Dispenser,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="solicitudes_archivadas",
+    )
+    ubicacion = models.ForeignKey(
+        'core.Ubicacion',
+        on_delete=models.PROTECT,
+        related_name="solicitudes_archivadas",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "ubicacion"], name="solicitud_arch_user_ubic_idx"),
+        ]
@@ -0,0 +1,78 @@
+import struct
+import sys
+from array import array
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from core.renderers import FastJSONRenderer
+
+MARKERS_MAGIC = b"AMK1"
+
+# Bits de `flags` en ambos formatos.
+FLAG_ESTADO = 1
+FLAG_PERMANENCIA = 2
+
+
+class MarkersColumnarRenderer(FastJSONRenderer):
+    """Marcadores como arrays paralelos: {ids, lats, lons, flags, nombres}.
+
+    Las coordenadas van en microgrados (enteros) y estado/permanencia como
+    bits de `flags`, sin claves repetidas por objeto.
+    """
+
+    media_type = "application/vnd.anymate.markers+json"
+    format = "columnar"
+
+
+class MarkersBinaryRenderer(BaseRenderer):
+    """Marcadores en binario little-endian, decodificable con TypedArrays.
+
+    Layout: magic "AMK1", uint32 count, int64 ids[count], int32 lats[count],
+    int32 lons[count], uint8 flags[count], relleno hasta múltiplo de 4,
+    uint32 name_offsets[count + 1] y los nombres en UTF-8 concatenados.
+    """
+
+    media_type = "application/vnd.anymate.markers"
+    format = "bin"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict) or "ids" not in data:
+            # Errores (permisos, 405, ...) se siguen devolviendo como JSON.
+            response = (renderer_context or {}).get("response")
+            if response is not None:
+                response["Content-Type"] = "application/json"
+            return JSONRenderer().render(data, renderer_context=renderer_context)
+
+        count = len(data["ids"])
+        columns = [
+            array("q", data["ids"]),
+            array("i", data["lats"]),
+            array("i", data["lons"]),
+            array("B", data["flags"]),
+        ]
+
+        names = [nombre.encode("utf-8") for nombre in data["nombres"]]
+        offsets = array("I", [0])
+        for name in names:
+            offsets.append(offsets[-1] + len(name))
+        padding = b"\0" * (-count % 4)
+
+        if sys.byteorder == "big":
+            for column in (*columns, offsets):
+                column.byteswap()
+
+        return b"".join(
+            [
+                MARKERS_MAGIC,
+                struct.pack("<I", count),
+                *(column.tobytes() for column in columns),
+                padding,
+                offsets.tobytes(),
+                *names,
+            ]
+        )
+
+
+MARKER_FORMATS = {MarkersColumnarRenderer.format, MarkersBinaryRenderer.format}
@@ -0,0 +1,141 @@
+"""Búsqueda aproximada por nombre de dispenser (`?q=`).
+
+En PostgreSQL usa pg_trgm: el operador `%>` (word_similarity) se resuelve con
+el índice GIN gin_trgm_ops de la migración 0005 y el ranking sale de
+word_similarity(). En otros motores (SQLite en desarrollo) se arma en memoria
+un índice invertido de trigramas con la misma tokenización que pg_trgm y se
+puntúa con NumPy.
+
+El índice en memoria es por proceso; la versión vive en el cache para que
+todos los workers lo reconstruyan cuando cambia el catálogo (ver
+signals.dispensers_changed).
+"""
+import re
+import threading
+import unicodedata
+import uuid
+
+import numpy as np
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.cache import cache
+from django.db import connections, router
+
+from .models import Dispenser
+
+VERSION_KEY = "dispenser_search:version"
+# Mismo valor por defecto que pg_trgm.word_similarity_threshold.
+MIN_SCORE = 0.6
+MAX_PAGE_SIZE = 100
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def trigrams(text: str) -> set[str]:
+    """Trigramas al estilo pg_trgm: por palabra, con dos espacios adelante y uno atrás."""
+    grams = set()
+    for word in _WORD_RE.findall(normalize(text)):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    def __init__(self, version: str, rows):
+        self.version = version
+        codigos, nombres, postings = [], [], {}
+        for position, (codigo, nombre) in enumerate(rows):
+            codigos.append(codigo)
+            nombres.append(normalize(nombre))
+            for gram in trigrams(nombre):
+                postings.setdefault(gram, []).append(position)
+        self.codigos = np.array(codigos, dtype=np.int64)
+        self.nombres = nombres
+        self.postings = {gram: np.array(docs, dtype=np.int32) for gram, docs in postings.items()}
+        # Posición alfabética de cada nombre, para desempatar sin comparar strings.
+        self.name_rank = np.empty(len(nombres), dtype=np.int64)
+        self.name_rank[sorted(range(len(nombres)), key=nombres.__getitem__)] = np.arange(len(nombres))
+
+    def search(self, q: str) -> tuple[np.ndarray, np.ndarray]:
+        """(códigos, puntajes) ordenados por puntaje y luego por nombre."""
+        grams = trigrams(q)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not grams or not hits:
+            return self.codigos[:0], np.zeros(0)
+
+        # Fracción de trigramas de la consulta presentes en el nombre: misma
+        # idea que word_similarity(), que mide contra la mejor porción del texto.
+        common = np.bincount(np.concatenate(hits), minlength=len(self.codigos))
+        scores = common / len(grams)
+
+        # Un nombre que contiene la consulta tiene todos sus trigramas sin
+        # espacios; solo esos candidatos se comparan como substring.
+        needle = normalize(q).strip()
+        inner = sum(1 for gram in grams if " " not in gram)
+        for pos in np.flatnonzero(common >= max(inner, 1)):
+            if needle in self.nombres[pos]:
+                scores[pos] = 1.0
+
+        candidates = np.flatnonzero(scores >= MIN_SCORE)
+        order = candidates[np.lexsort((self.name_rank[candidates], -scores[candidates]))]
+        return self.codigos[order], scores[order]
+
+
+_lock = threading.Lock()
+_index: TrigramIndex | None = None
+
+
+def _current_version() -> str:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_index() -> TrigramIndex:
+    global _index
+    # La versión se lee antes de consultar la base: un cambio concurrente
+    # deja una versión nueva y fuerza otra reconstrucción.
+    version = _current_version()
+    with _lock:
+        if _index is None or _index.version != version:
+            rows = Dispenser.objects.order_by("codigo_dispenser").values_list("codigo_dispenser", "nombre_dispenser")
+            _index = TrigramIndex(version, rows.iterator(chunk_size=5000))
+        return _index
+
+
+def invalidate(**kwargs) -> None:
+    cache.delete(VERSION_KEY)
+
+
+def search(q: str, offset: int, limit: int) -> tuple[int, list[tuple[int, float]]]:
+    """Devuelve (total, [(codigo_dispenser, puntaje)]) para la página pedida."""
+    alias = router.db_for_read(Dispenser)
+    if connections[alias].vendor == "postgresql":
+        qs = (
+            Dispenser.objects.filter(nombre_dispenser__trigram_word_similar=q)
+            .annotate(score=TrigramWordSimilarity(q, "nombre_dispenser"))
+            .order_by("-score", "nombre_dispenser")
+        )
+        total = qs.count()
+        return total, list(qs.values_list("codigo_dispenser", "score")[offset : offset + limit])
+
+    codigos, scores = get_index().search(q)
+    page = slice(offset, offset + limit)
+    return len(codigos), list(zip(codigos[page].tolist(), scores[page].tolist()))
+
+
+def load_page(page: list[tuple[int, float]]) -> list[Dispenser]:
+    """Dispensers de la página en el orden del ranking, con `score` asignado."""
+    scores = dict(page)
+    rank = {codigo: i for i, (codigo, _) in enumerate(page)}
+    dispensers = Dispenser.objects.filter(codigo_dispenser__in=scores).select_related("ubicacion").prefetch_related("imagenes")
+    dispensers = sorted(dispensers, key=lambda d: rank[d.codigo_dispenser])
+    for dispenser in dispensers:
+        dispenser.score = round(scores[dispenser.codigo_dispenser], 3)
+    return dispensers
@@ -1,13 +1,21 @@
 from rest_framework import serializers
 
+from core.coords import to_degrees
 from core.models import Imagen, Ubicacion
 from .models import Dispenser, DispenserImagen
 
 
+class CoordinateField(serializers.ReadOnlyField):
+    """Lee microgrados (entero) y los expone como grados (float)."""
+
+    def to_representation(self, value):
+        return to_degrees(value)
+
+
 class UbicacionSerializer(serializers.ModelSerializer):
-    # Ubicacion usa DecimalField; para el frontend necesitamos números.
-    latitud = serializers.FloatField()
-    longitud = serializers.FloatField()
+    # Ubicacion guarda microgrados; para el frontend necesitamos grados.
+    latitud = CoordinateField(source="latitud_e6")
+    longitud = CoordinateField(source="longitud_e6")
 
     class Meta:
         model = Ubicacion
@@ -36,6 +44,13 @@ class DispenserSerializer(serializers.ModelSerializer):
         ]
 
 
+class DispenserSearchResultSerializer(DispenserSerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(DispenserSerializer.Meta):
+        fields = [*DispenserSerializer.Meta.fields, "score"]
+
+
 class DispenserCreateUpdateSerializer(serializers.Serializer):
     nombre_dispenser = serializers.CharField(max_length=255)
     estado = serializers.BooleanField(required=False, default=False)
@@ -49,3 +64,37 @@ class DispenserCreateUpdateSerializer(serializers.Serializer):
         if not value:
             raise serializers.ValidationError("El nombre es obligatorio")
         return value
+
+
+class DispenserPatchSerializer(serializers.Serializer):
+    """PATCH parcial: solo se validan y guardan los campos enviados."""
+
+    nombre_dispenser = serializers.CharField(max_length=255, required=False)
+    estado = serializers.BooleanField(required=False)
+    permanencia = serializers.BooleanField(required=False)
+    latitud = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    longitud = serializers.FloatField(required=False, min_value=-180, max_value=180)
+
+    def validate_nombre_dispenser(self, value: str):
+        value = value.strip()
+        if not value:
+            raise serializers.ValidationError("El nombre es obligatorio")
+        return value
+
+    def validate(self, attrs):
+        if ("latitud" in attrs) != ("longitud" in attrs):
+            raise serializers.ValidationError("latitud y longitud van juntas")
+        if not attrs:
+            raise serializers.ValidationError("No hay campos para actualizar")
+        return attrs
+
+
+class DispenserBulkStateSerializer(serializers.Serializer):
+    codigos = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=5000)
+    estado = serializers.BooleanField(required=False)
+    permanencia = serializers.BooleanField(required=False)
+
+    def validate(self, attrs):
+        if "estado" not in attrs and "permanencia" not in attrs:
+            raise serializers.ValidationError("Indicar estado y/o permanencia")
+        return attrs
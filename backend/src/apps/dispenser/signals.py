@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import catalogue, search
+from .models import Dispenser, DispenserImagen
+
+# Cambió el catálogo de dispensers. Los guardados individuales llegan por
+# post_save/post_delete; las escrituras masivas (bulk_create, update) lo
+# envían a mano. Argumentos: codigos (lista de codigo_dispenser afectados) y
+# fields (campos que cambiaron; None = altas, bajas o no se sabe).
+dispensers_changed = Signal()
+
+
+@receiver(post_save, sender=Dispenser)
+def dispenser_saved(sender, instance, created, update_fields=None, **kwargs):
+    fields = None if created or update_fields is None else list(update_fields)
+    dispensers_changed.send(sender=Dispenser, codigos=[instance.pk], fields=fields)
+
+
+@receiver(post_delete, sender=Dispenser)
+def dispenser_deleted(sender, instance, **kwargs):
+    dispensers_changed.send(sender=Dispenser, codigos=[instance.pk], fields=None)
+
+
+@receiver(post_save, sender=DispenserImagen)
+@receiver(post_delete, sender=DispenserImagen)
+def dispenser_imagen_saved(sender, instance, **kwargs):
+    dispensers_changed.send(sender=Dispenser, codigos=[instance.dispenser_id], fields=["imagenes"])
+
+
+@receiver(dispensers_changed)
+def invalidate_search(sender, fields=None, **kwargs):
+    # El índice solo tiene nombres: estado, permanencia, ubicación o
+    # imágenes no lo cambian, y reconstruirlo cuesta segundos con 100k filas.
+    if fields is None or "nombre_dispenser" in fields:
+        search.invalidate()
+
+
+@receiver(dispensers_changed)
+def publish_catalogue(sender, **kwargs):
+    transaction.on_commit(catalogue.schedule_publish)
@@ -0,0 +1,287 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.coords import format_coord, normalize_coord, normalize_coords
+from core.models import Ubicacion
+from . import bulk, catalogue, heatmap
+from .models import Dispenser, Solicitud, SolicitudArchivada
+
+
+def decimal_quantize(value: float) -> int:
+    """El redondeo previo a los microgrados, como referencia."""
+    return int(Decimal(str(value)).quantize(Decimal("0.0001"), rounding=ROUND_HALF_UP) * 1_000_000)
+
+
+class NormalizeCoordTests(SimpleTestCase):
+    def test_ties_round_away_from_zero(self):
+        self.assertEqual(normalize_coord(1.00005), 1_000_100)
+        self.assertEqual(normalize_coord(-1.00005), -1_000_100)
+        self.assertEqual(normalize_coord(-34.60375), -34_603_800)
+
+    def test_below_tie_rounds_down(self):
+        self.assertEqual(normalize_coord(1.0000499), 1_000_000)
+        self.assertEqual(normalize_coord(-1.0000499), -1_000_000)
+
+    def test_more_than_nine_decimals(self):
+        # En nanogrados parece un empate (127208950000) pero está por debajo.
+        self.assertEqual(normalize_coord(127.20894999984603), 127_208_900)
+        self.assertEqual(normalize_coord(-127.20894999984603), -127_208_900)
+
+    def test_zero_and_limits(self):
+        self.assertEqual(normalize_coord(0.0), 0)
+        self.assertEqual(normalize_coord(-0.0), 0)
+        self.assertEqual(normalize_coord(180.0), 180_000_000)
+        self.assertEqual(normalize_coord(-90.0), -90_000_000)
+
+    def test_matches_decimal_quantize(self):
+        values = [-58.38161234, -34.6037, 12.345649999, -0.00005, 0.00004999999999, 179.99995, -179.99995]
+        for value in values:
+            with self.subTest(value=value):
+                self.assertEqual(normalize_coord(value), decimal_quantize(value))
+
+    def test_vectorized_matches_scalar(self):
+        values = [1.00005, -1.00005, 127.20894999984603, -34.60375, 0.0, -58.38161234]
+        self.assertEqual(normalize_coords(values).tolist(), [normalize_coord(value) for value in values])
+
+    def test_format_coord(self):
+        self.assertEqual(format_coord(-34_603_700), "-34.603700")
+        self.assertEqual(format_coord(-500), "-0.000500")
+
+
+def collect(stream) -> str:
+    """Consume un generador async de exportación."""
+
+    async def run():
+        return "".join([part async for part in stream])
+
+    return async_to_sync(run)()
+
+
+def csv_file(*lines: str) -> io.BytesIO:
+    header = "nombre_dispenser,latitud,longitud,estado,permanencia,imagenes\n"
+    return io.BytesIO((header + "".join(line + "\n" for line in lines)).encode())
+
+
+class BulkImportExportTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(self.media, "dispensers"))
+        for name in ("a.jpg", "b.jpg"):
+            with open(os.path.join(self.media, "dispensers", name), "wb") as fh:
+                fh.write(b"x")
+
+    def test_import_csv(self):
+        report = bulk.import_dispensers(
+            bulk.iter_csv_rows(csv_file("Plaza,-34.60375,-58.38161,true,0,dispensers/a.jpg|dispensers/b.jpg"))
+        )
+        self.assertEqual((report["creados"], report["errores"]), (1, []))
+        dispenser = Dispenser.objects.select_related("ubicacion").get(nombre_dispenser="Plaza")
+        self.assertEqual(dispenser.ubicacion.latitud_e6, -34_603_800)
+        self.assertEqual(sorted(dispenser.imagenes.values_list("ruta_imagen", flat=True)), ["dispensers/a.jpg", "dispensers/b.jpg"])
+
+    def test_row_errors_do_not_cancel_valid_rows(self):
+        report = bulk.import_dispensers(
+            bulk.iter_csv_rows(
+                csv_file(
+                    "Ok,-34,-58,1,0,",
+                    "Lejos,100,0,1,0,",
+                    "Falta,-34,-58.1,1,0,dispensers/no-existe.jpg",
+                    "Afuera,-34,-58.2,1,0,../settings.py",
+                    "Absoluta,-34,-58.3,1,0,/etc/passwd",
+                )
+            )
+        )
+        self.assertEqual(report["creados"], 1)
+        self.assertEqual([error["fila"] for error in report["errores"]], [3, 4, 5, 6])
+        self.assertEqual(list(Dispenser.objects.values_list("nombre_dispenser", flat=True)), ["Ok"])
+
+    def test_truncated_geojson_rolls_back(self):
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [-58 - i / 100, -34]},
+                "properties": {"nombre_dispenser": f"G{i}"},
+            }
+            for i in range(30)
+        ]
+        document = json.dumps({"type": "FeatureCollection", "features": features})
+        truncated = io.BytesIO(document[: len(document) // 2].encode())
+
+        report = bulk.import_dispensers(bulk.iter_geojson_rows(truncated), batch_size=5)
+
+        self.assertEqual((report["creados"], report["codigos"]), (0, []))
+        self.assertIsNone(report["errores"][-1]["fila"])
+        self.assertFalse(Dispenser.objects.exists())
+
+    def test_export_round_trip(self):
+        bulk.import_dispensers(
+            bulk.iter_csv_rows(
+                csv_file(
+                    "Uno,-34.6037,-58.3816,true,false,dispensers/a.jpg",
+                    'Dos "comillas",-31.4201,-64.1888,false,true,',
+                )
+            )
+        )
+        before = list(
+            Dispenser.objects.order_by("nombre_dispenser").values_list(
+                "nombre_dispenser", "estado", "permanencia", "ubicacion__latitud_e6", "ubicacion__longitud_e6"
+            )
+        )
+        exported = collect(bulk.export_csv())
+        geojson = json.loads(collect(bulk.export_geojson()))
+        self.assertEqual(len(geojson["features"]), 2)
+
+        Dispenser.objects.all().delete()
+        report = bulk.import_dispensers(bulk.iter_csv_rows(io.BytesIO(exported.encode())))
+        self.assertEqual((report["creados"], report["errores"]), (2, []))
+        after = list(
+            Dispenser.objects.order_by("nombre_dispenser").values_list(
+                "nombre_dispenser", "estado", "permanencia", "ubicacion__latitud_e6", "ubicacion__longitud_e6"
+            )
+        )
+        self.assertEqual(after, before)
+        self.assertEqual(
+            list(Dispenser.objects.get(nombre_dispenser="Uno").imagenes.values_list("ruta_imagen", flat=True)),
+            ["dispensers/a.jpg"],
+        )
+
+
+class HeatmapTests(TestCase):
+    def setUp(self):
+        heatmap.invalidate()
+        self.addCleanup(heatmap.invalidate)
+        self.users = iter(User.objects.create(username=f"u{i}") for i in range(100))
+
+    def solicitud(self, lat: float, lon: float, **kwargs) -> Solicitud:
+        ubicacion, _ = Ubicacion.objects.get_or_create(latitud_e6=normalize_coord(lat), longitud_e6=normalize_coord(lon))
+        return Solicitud.objects.create(user=next(self.users), ubicacion=ubicacion, **kwargs)
+
+    def test_new_solicitudes_are_added_on_read(self):
+        self.solicitud(-34.60, -58.40)
+        self.solicitud(-34.70, -58.50)
+        heatmap.get_level(0)
+        self.solicitud(-34.65, -58.45)
+        self.solicitud(-34.65, -58.45)
+
+        bounds, grid = heatmap.get_level(heatmap.MAX_ZOOM)
+        self.assertEqual(int(grid.sum()), 4)
+        self.assertEqual(int(heatmap.get_level(0)[1].sum()), 4)
+        # Sin reconstruir: el meta sigue siendo el del primer build.
+        self.assertEqual(cache.get(heatmap.META_KEY)["bounds"], bounds)
+
+    def test_late_commit_below_seq_is_counted_once(self):
+        self.solicitud(-34.60, -58.40)
+        gap = self.solicitud(-34.61, -58.41)
+        self.solicitud(-34.70, -58.50)
+        gap_pk = gap.pk
+        gap.delete()
+        heatmap.get_level(0)
+        # Código menor que el último contado, como una transacción que confirma tarde.
+        self.solicitud(-34.65, -58.45, codigo_solicitud=gap_pk)
+
+        for _ in range(2):
+            self.assertEqual(int(heatmap.get_level(heatmap.MAX_ZOOM)[1].sum()), 3)
+        heatmap.invalidate()
+        self.assertEqual(int(heatmap.get_level(heatmap.MAX_ZOOM)[1].sum()), 3)
+
+    def test_solicitud_outside_bounds_rebuilds(self):
+        self.solicitud(-34.60, -58.40)
+        heatmap.get_level(0)
+        self.solicitud(-31.40, -64.18)
+
+        bounds, grid = heatmap.get_level(0)
+        self.assertLessEqual(bounds[0], normalize_coord(-34.60))
+        self.assertGreater(bounds[1], normalize_coord(-31.40))
+        self.assertEqual(int(np.sum(grid)), 2)
+
+
+class SolicitudCreateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="comun")
+        self.user.groups.add(Group.objects.get_or_create(name="Usuario Comun")[0])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self):
+        return self.client.post("/api/solicitudes/", {"latitud": -34.60375, "longitud": -58.38161}, format="json")
+
+    def test_second_solicitud_is_rejected(self):
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(self.post().status_code, 400)
+        self.assertEqual(Solicitud.objects.count(), 1)
+
+    def test_archived_solicitud_counts_as_duplicate(self):
+        self.assertEqual(self.post().status_code, 201)
+        solicitud = Solicitud.objects.get()
+        SolicitudArchivada.objects.create(
+            codigo_solicitud=solicitud.codigo_solicitud,
+            fecha_solicitud=solicitud.fecha_solicitud,
+            estado=Solicitud.Estado.ACEPTADA,
+            aceptada_en=timezone.now(),
+            user=self.user,
+            ubicacion=solicitud.ubicacion,
+        )
+        solicitud.delete()
+
+        self.assertEqual(self.post().status_code, 400)
+        self.assertFalse(Solicitud.objects.exists())
+
+
+class CatalogueTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        override = override_settings(MEDIA_ROOT=self.media, CATALOGUE_PUBLISH_DELAY=0)
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.delete(catalogue.MANIFEST_KEY)
+        self.addCleanup(cache.delete, catalogue.MANIFEST_KEY)
+
+    def dispenser(self, nombre: str) -> Dispenser:
+        ubicacion = Ubicacion.objects.create(latitud_e6=-34_600_000 - Dispenser.objects.count(), longitud_e6=-58_400_000)
+        return Dispenser.objects.create(nombre_dispenser=nombre, ubicacion=ubicacion)
+
+    def test_missing_manifest_is_not_published_on_get(self):
+        response = self.client.get("/api/catalogue/")
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+        self.assertFalse(os.path.exists(os.path.join(self.media, catalogue.DIRNAME, catalogue.MANIFEST_NAME)))
+
+        catalogue.publish()
+        self.assertEqual(self.client.get("/api/catalogue/").status_code, 200)
+
+    def test_cached_manifest_follows_the_file(self):
+        self.dispenser("Uno")
+        first = catalogue.publish()
+        self.assertEqual(catalogue.get_manifest()["version"], first["version"])
+
+        # Otro worker publica: el cache de este proceso queda viejo.
+        cached = cache.get(catalogue.MANIFEST_KEY)
+        self.dispenser("Dos")
+        second = catalogue.publish()
+        cache.set(catalogue.MANIFEST_KEY, cached, None)
+        self.assertNotEqual(second["version"], first["version"])
+        self.assertEqual(catalogue.get_manifest()["version"], second["version"])
+
+    def test_publish_skipped_when_a_later_one_covered_it(self):
+        requested_at = time.time()
+        self.assertIsNotNone(catalogue.publish())
+        self.assertIsNone(catalogue.publish(since=requested_at))
+        self.assertIsNotNone(catalogue.publish(since=time.time()))
@@ -1,17 +1,40 @@
+from django.conf import settings
 from django.urls import path
 
 from .views import (
+    CatalogueManifestView,
+    DispenserBulkStateView,
     DispenserDetailView,
+    DispenserExportView,
+    DispenserImportView,
     DispenserListCreateView,
     SolicitudCreateView,
     SolicitudAcceptAdminView,
+    SolicitudesClustersAdminView,
+    SolicitudesHeatmapAdminView,
     SolicitudesSummaryAdminView,
 )
 
+from .async_views import EventStreamView
+
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import (
+        DispenserDetailAsyncView as DispenserDetailView,
+        DispenserListAsyncView as DispenserListCreateView,
+        SolicitudesSummaryAdminAsyncView as SolicitudesSummaryAdminView,
+    )
+
 urlpatterns = [
     path('dispensers/', DispenserListCreateView.as_view(), name='dispenser_list_create'),
+    path('dispensers/import/', DispenserImportView.as_view(), name='dispenser_import'),
+    path('dispensers/export/', DispenserExportView.as_view(), name='dispenser_export'),
+    path('dispensers/estado/', DispenserBulkStateView.as_view(), name='dispenser_bulk_state'),
     path('dispensers/<int:codigo_dispenser>/', DispenserDetailView.as_view(), name='dispenser_detail'),
     path('solicitudes/', SolicitudCreateView.as_view(), name='solicitud_create'),
     path('solicitudes/summary/', SolicitudesSummaryAdminView.as_view(), name='solicitudes_summary_admin'),
+    path('solicitudes/heatmap/', SolicitudesHeatmapAdminView.as_view(), name='solicitudes_heatmap_admin'),
+    path('solicitudes/clusters/', SolicitudesClustersAdminView.as_view(), name='solicitudes_clusters_admin'),
     path('solicitudes/accept/', SolicitudAcceptAdminView.as_view(), name='solicitud_accept_admin'),
+    path('catalogue/', CatalogueManifestView.as_view(), name='catalogue_manifest'),
+    path('events/', EventStreamView.as_view(), name='event_stream'),
 ]
@@ -1,40 +1,45 @@
 import os
-from decimal import Decimal, ROUND_HALF_UP
-from django.db import IntegrityError
+from django.db import IntegrityError, router, transaction
 from django.conf import settings
 from django.core.files.storage import default_storage
 from django.db.models.deletion import ProtectedError
 from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from rest_framework import status
-from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
+from core.coords import format_coord, normalize_coord
 from core.models import Imagen, Ubicacion
-from .models import Dispenser, DispenserImagen, Solicitud
+from . import bulk, catalogue, clustering, events, heatmap, search
+from .models import Dispenser, DispenserImagen, Solicitud, SolicitudArchivada
+from .signals import dispensers_changed
 from .permissions import IsAdminOrEmpleado, IsAdministrador, IsUsuarioComun
-from .serializers import DispenserSerializer, DispenserCreateUpdateSerializer
-
-
-ROUND_DECIMALS = 4
-
-
-def _normalize_coord(value: float, decimals: int = ROUND_DECIMALS) -> Decimal:
-    step = Decimal("1").scaleb(-decimals)  # e.g. 0.0001
-    return Decimal(str(value)).quantize(step, rounding=ROUND_HALF_UP)
+from .renderers import FLAG_ESTADO, FLAG_PERMANENCIA, MARKER_FORMATS, MarkersBinaryRenderer, MarkersColumnarRenderer
+from .serializers import (
+    DispenserBulkStateSerializer,
+    DispenserCreateUpdateSerializer,
+    DispenserPatchSerializer,
+    DispenserSearchResultSerializer,
+    DispenserSerializer,
+)
 
 
 def _get_or_create_ubicacion(latitud: float, longitud: float) -> Ubicacion:
-    lat = _normalize_coord(latitud)
-    lon = _normalize_coord(longitud)
+    lat = normalize_coord(latitud)
+    lon = normalize_coord(longitud)
     try:
-        ubicacion, _ = Ubicacion.objects.get_or_create(latitud=lat, longitud=lon)
+        ubicacion, _ = Ubicacion.objects.get_or_create(latitud_e6=lat, longitud_e6=lon)
         return ubicacion
     except IntegrityError:
         # En caso de carrera, la constraint única puede fallar; re-leer.
-        return Ubicacion.objects.get(latitud=lat, longitud=lon)
+        return Ubicacion.objects.get(latitud_e6=lat, longitud_e6=lon)
 
 
 def _save_uploaded_file(file_obj) -> str:
@@ -46,13 +51,76 @@ def _save_uploaded_file(file_obj) -> str:
     return saved_path
 
 
+def _attach_imagen(dispenser: Dispenser, ruta: str) -> None:
+    # En una transacción: gc_media nunca ve la Imagen sin su vínculo.
+    with transaction.atomic():
+        imagen = Imagen.objects.create(ruta_imagen=ruta)
+        DispenserImagen.objects.create(dispenser=dispenser, imagen=imagen)
+
+
+def _marker_columns() -> dict:
+    # Una sola consulta plana, sin instanciar modelos ni serializers.
+    rows = Dispenser.objects.order_by("codigo_dispenser").values_list(
+        "codigo_dispenser",
+        "nombre_dispenser",
+        "estado",
+        "permanencia",
+        "ubicacion__latitud_e6",
+        "ubicacion__longitud_e6",
+    )
+    columns = {"ids": [], "nombres": [], "lats": [], "lons": [], "flags": []}
+    for codigo, nombre, estado, permanencia, latitud, longitud in rows:
+        columns["ids"].append(codigo)
+        columns["nombres"].append(nombre)
+        columns["lats"].append(latitud)
+        columns["lons"].append(longitud)
+        columns["flags"].append((FLAG_ESTADO if estado else 0) | (FLAG_PERMANENCIA if permanencia else 0))
+    return columns
+
+
 class DispenserListCreateView(APIView):
     permission_classes = [IsAdminOrEmpleado]
     parser_classes = [MultiPartParser, FormParser]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, MarkersColumnarRenderer, MarkersBinaryRenderer]
+    replica_reads = True
+    throttle_scope = "admin_write"
 
     def get(self, request):
-        qs = Dispenser.objects.select_related("ubicacion").prefetch_related("imagenes").all().order_by("codigo_dispenser")
-        return Response(DispenserSerializer(qs, many=True).data)
+        # Formato compacto para el mapa: Accept: application/vnd.anymate.markers[+json]
+        # o ?format=columnar / ?format=bin.
+        q = request.query_params.get("q", "").strip()
+        if request.accepted_renderer.format in MARKER_FORMATS:
+            response = Response(_marker_columns())
+        elif q:
+            response = self.search(request, q)
+        else:
+            qs = Dispenser.objects.select_related("ubicacion").prefetch_related("imagenes").all().order_by("codigo_dispenser")
+            response = Response(DispenserSerializer(qs, many=True).data)
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    def search(self, request, q: str) -> Response:
+        """?q= : resultados por similitud de nombre, paginados con ?page= y ?page_size=."""
+        try:
+            page = int(request.query_params.get("page", 1))
+            page_size = int(request.query_params.get("page_size", 20))
+        except ValueError:
+            return Response({"detail": "page/page_size inválidos"}, status=status.HTTP_400_BAD_REQUEST)
+        if page < 1 or not 1 <= page_size <= search.MAX_PAGE_SIZE:
+            return Response(
+                {"detail": f"page debe ser >= 1 y page_size entre 1 y {search.MAX_PAGE_SIZE}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        total, ranked = search.search(q, offset=(page - 1) * page_size, limit=page_size)
+        return Response(
+            {
+                "count": total,
+                "page": page,
+                "page_size": page_size,
+                "results": DispenserSearchResultSerializer(search.load_page(ranked), many=True).data,
+            }
+        )
 
     def post(self, request):
         serializer = DispenserCreateUpdateSerializer(data=request.data)
@@ -74,18 +142,116 @@ class DispenserListCreateView(APIView):
         foto = data.get("foto")
         if foto:
             ruta = _save_uploaded_file(foto)
-            imagen = Imagen.objects.create(ruta_imagen=ruta)
-            DispenserImagen.objects.create(dispenser=dispenser, imagen=imagen)
+            _attach_imagen(dispenser, ruta)
 
+        events.dispensers_created([dispenser.codigo_dispenser])
         return Response(DispenserSerializer(dispenser).data, status=status.HTTP_201_CREATED)
 
 
-class DispenserDetailView(APIView):
+class DispenserImportView(APIView):
+    """Alta masiva desde un archivo CSV o GeoJSON (campo `archivo`).
+
+    El formato sale de `formato` o de la extensión del archivo. Responde con
+    la cantidad de filas, los dispensers creados y los errores por fila.
+    """
+
     permission_classes = [IsAdminOrEmpleado]
     parser_classes = [MultiPartParser, FormParser]
+    throttle_scope = "admin_write"
+
+    def post(self, request):
+        archivo = request.data.get("archivo")
+        if not archivo:
+            return Response({"detail": "archivo es obligatorio"}, status=status.HTTP_400_BAD_REQUEST)
+
+        formato = (request.data.get("formato") or os.path.splitext(archivo.name)[1].lstrip(".")).lower()
+        if formato == "json":
+            formato = "geojson"
+        readers = {"csv": bulk.iter_csv_rows, "geojson": bulk.iter_geojson_rows}
+        if formato not in readers:
+            return Response({"detail": "formato inválido (csv|geojson)"}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = bulk.import_dispensers(readers[formato](archivo))
+        if report["codigos"]:
+            events.dispensers_created(report["codigos"])
+        code = status.HTTP_201_CREATED if report["creados"] else status.HTTP_400_BAD_REQUEST
+        return Response(report, status=code)
+
+
+class DispenserExportView(APIView):
+    """Exporta el catálogo completo en streaming: ?formato=csv|geojson."""
+
+    permission_classes = [IsAdminOrEmpleado]
+    replica_reads = True
+
+    def get(self, request):
+        # `format` lo reserva DRF para la negociación de renderers.
+        formato = request.query_params.get("formato", "csv").lower()
+        # El cuerpo se genera después de salir del middleware de réplicas:
+        # la base se elige acá, mientras el request todavía tiene su ruteo.
+        using = router.db_for_read(Dispenser)
+        if formato == "csv":
+            content, content_type = bulk.export_csv(using), "text/csv; charset=utf-8"
+        elif formato == "geojson":
+            content, content_type = bulk.export_geojson(using), "application/geo+json"
+        else:
+            return Response({"detail": "formato inválido (csv|geojson)"}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="dispensers.{formato}"'
+        return response
+
+
+class CatalogueManifestView(APIView):
+    """Manifest del snapshot estático del catálogo (ver dispenser.catalogue).
+
+    No toca la base: el manifest sale del cache. Los archivos a los que
+    apunta son inmutables y los sirve el servidor estático. Si todavía no se
+    publicó responde 503; no se publica desde un GET.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        manifest = catalogue.get_manifest()
+        if manifest is None:
+            response = Response(
+                {"detail": "El catálogo todavía no se publicó"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            response["Retry-After"] = str(settings.CATALOGUE_MANIFEST_MAX_AGE)
+            return response
+        etag = f'"{manifest["version"]}"'
+        if etag in request.headers.get("If-None-Match", ""):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            base = settings.CATALOGUE_BASE_URL or request.build_absolute_uri(settings.MEDIA_URL)
+
+            def with_url(entry):
+                return {**entry, "url": base.rstrip("/") + "/" + entry["path"]}
+
+            response = Response(
+                {
+                    **manifest,
+                    "full": with_url(manifest["full"]),
+                    "shards": {key: with_url(entry) for key, entry in manifest["shards"].items()},
+                }
+            )
+        response["ETag"] = etag
+        response["Cache-Control"] = f"public, max-age={settings.CATALOGUE_MANIFEST_MAX_AGE}"
+        return response
+
+
+class DispenserDetailView(APIView):
+    permission_classes = [IsAdminOrEmpleado]
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    replica_reads = True
+    throttle_scope = "admin_write"
 
     def get_object(self, codigo_dispenser: int) -> Dispenser:
-        return Dispenser.objects.select_related("ubicacion").prefetch_related("imagenes").get(codigo_dispenser=codigo_dispenser)
+        qs = Dispenser.objects.select_related("ubicacion").prefetch_related("imagenes")
+        return get_object_or_404(qs, codigo_dispenser=codigo_dispenser)
 
     def get(self, request, codigo_dispenser: int):
         dispenser = self.get_object(codigo_dispenser)
@@ -97,33 +263,91 @@ class DispenserDetailView(APIView):
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
 
+        # update_fields explícito: si el nombre no cambia no hace falta
+        # reconstruir el índice de búsqueda (ver signals.invalidate_search).
+        update_fields = ["estado", "permanencia", "ubicacion"]
+        if data["nombre_dispenser"] != dispenser.nombre_dispenser:
+            update_fields.append("nombre_dispenser")
         dispenser.nombre_dispenser = data["nombre_dispenser"]
         dispenser.estado = data.get("estado", dispenser.estado)
         dispenser.permanencia = data.get("permanencia", dispenser.permanencia)
-        dispenser.save()
-
         dispenser.ubicacion = _get_or_create_ubicacion(
             latitud=data["latitud"],
             longitud=data["longitud"],
         )
-        dispenser.save()
+        dispenser.save(update_fields=update_fields)
 
         foto = data.get("foto")
         if foto:
             ruta = _save_uploaded_file(foto)
-            imagen = Imagen.objects.create(ruta_imagen=ruta)
-            DispenserImagen.objects.create(dispenser=dispenser, imagen=imagen)
+            _attach_imagen(dispenser, ruta)
 
+        events.dispensers_updated([dispenser.codigo_dispenser])
         return Response(DispenserSerializer(dispenser).data)
 
     def delete(self, request, codigo_dispenser: int):
         dispenser = self.get_object(codigo_dispenser)
         dispenser.delete()
+        events.dispensers_deleted([codigo_dispenser])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def patch(self, request, codigo_dispenser: int):
+        """Actualiza solo los campos enviados (JSON o form) con save(update_fields=...)."""
+        dispenser = self.get_object(codigo_dispenser)
+        serializer = DispenserPatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        changed = [
+            field
+            for field in ("nombre_dispenser", "estado", "permanencia")
+            if field in data and data[field] != getattr(dispenser, field)
+        ]
+        for field in changed:
+            setattr(dispenser, field, data[field])
+
+        if "latitud" in data:
+            latitud_e6, longitud_e6 = normalize_coord(data["latitud"]), normalize_coord(data["longitud"])
+            if (latitud_e6, longitud_e6) != (dispenser.ubicacion.latitud_e6, dispenser.ubicacion.longitud_e6):
+                dispenser.ubicacion = _get_or_create_ubicacion(latitud=data["latitud"], longitud=data["longitud"])
+                changed.append("ubicacion")
+
+        if changed:
+            try:
+                dispenser.save(update_fields=changed)
+            except IntegrityError:
+                return Response({"detail": "Ya existe un dispenser con ese nombre"}, status=status.HTTP_400_BAD_REQUEST)
+            events.dispensers_updated([dispenser.codigo_dispenser])
+        return Response(DispenserSerializer(dispenser).data)
+
+
+class DispenserBulkStateView(APIView):
+    """Cambia estado y/o permanencia de muchos dispensers con un solo UPDATE.
+
+    Body JSON: {"codigos": [1, 2, ...], "estado": true, "permanencia": false}.
+    """
+
+    permission_classes = [IsAdminOrEmpleado]
+    throttle_scope = "admin_write"
+
+    def post(self, request):
+        serializer = DispenserBulkStateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        codigos = sorted(set(data["codigos"]))
+        fields = {field: data[field] for field in ("estado", "permanencia") if field in data}
+
+        actualizados = Dispenser.objects.filter(codigo_dispenser__in=codigos).update(**fields)
+        if actualizados:
+            # update() no dispara post_save.
+            dispensers_changed.send(sender=Dispenser, codigos=codigos, fields=list(fields))
+            events.dispensers_state_changed(codigos, fields)
+        return Response({"actualizados": actualizados, "solicitados": len(codigos)})
+
 
 class SolicitudCreateView(APIView):
     permission_classes = [IsAuthenticated, IsUsuarioComun]
+    throttle_scope = "solicitudes"
 
     def post(self, request):
         lat = request.data.get("latitud")
@@ -139,27 +363,39 @@ class SolicitudCreateView(APIView):
 
         ubicacion = _get_or_create_ubicacion(latitud=lat_f, longitud=lon_f)
 
-        # Un usuario solo puede hacer 1 solicitud por coordenada normalizada.
-        if Solicitud.objects.filter(user=request.user, ubicacion=ubicacion).exists():
-            return Response(
-                {"detail": "Ya realizaste una solicitud para estas coordenadas"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        solicitud = Solicitud.objects.create(
-            user=request.user,
-            ubicacion=ubicacion,
-            dispenser=None,
-            estado=Solicitud.Estado.PENDIENTE,
+        # Un usuario solo puede hacer 1 solicitud por coordenada normalizada,
+        # contando también las que ya se archivaron. El lock sobre la ubicación
+        # serializa el chequeo y el insert: la constraint única solo cubre
+        # Solicitud, no SolicitudArchivada.
+        duplicada = Response(
+            {"detail": "Ya realizaste una solicitud para estas coordenadas"},
+            status=status.HTTP_400_BAD_REQUEST,
         )
+        try:
+            with transaction.atomic():
+                Ubicacion.objects.select_for_update().get(pk=ubicacion.pk)
+                if (
+                    Solicitud.objects.filter(user=request.user, ubicacion=ubicacion).exists()
+                    or SolicitudArchivada.objects.filter(user=request.user, ubicacion=ubicacion).exists()
+                ):
+                    return duplicada
+                solicitud = Solicitud.objects.create(
+                    user=request.user,
+                    ubicacion=ubicacion,
+                    dispenser=None,
+                    estado=Solicitud.Estado.PENDIENTE,
+                )
+        except IntegrityError:
+            return duplicada
+        events.solicitud_created(ubicacion)
         return Response(
             {
                 "codigo_solicitud": solicitud.codigo_solicitud,
                 "fecha_solicitud": solicitud.fecha_solicitud,
                 "ubicacion": {
                     "codigo_ubicacion": ubicacion.codigo_ubicacion,
-                    "latitud": str(ubicacion.latitud),
-                    "longitud": str(ubicacion.longitud),
+                    "latitud": format_coord(ubicacion.latitud_e6),
+                    "longitud": format_coord(ubicacion.longitud_e6),
                 },
             },
             status=status.HTTP_201_CREATED,
@@ -168,6 +404,7 @@ class SolicitudCreateView(APIView):
 
 class SolicitudesSummaryAdminView(APIView):
     permission_classes = [IsAuthenticated, IsAdministrador]
+    replica_reads = True
 
     def get(self, request):
         qs = (
@@ -175,8 +412,8 @@ class SolicitudesSummaryAdminView(APIView):
             .filter(estado=Solicitud.Estado.PENDIENTE)
             .values(
                 "ubicacion__codigo_ubicacion",
-                "ubicacion__latitud",
-                "ubicacion__longitud",
+                "ubicacion__latitud_e6",
+                "ubicacion__longitud_e6",
             )
             .annotate(total=Count("codigo_solicitud"), last=Max("fecha_solicitud"))
             .order_by("-total", "-last")
@@ -185,8 +422,8 @@ class SolicitudesSummaryAdminView(APIView):
         results = [
             {
                 "codigo_ubicacion": row["ubicacion__codigo_ubicacion"],
-                "latitud": str(row["ubicacion__latitud"]),
-                "longitud": str(row["ubicacion__longitud"]),
+                "latitud": format_coord(row["ubicacion__latitud_e6"]),
+                "longitud": format_coord(row["ubicacion__longitud_e6"]),
                 "total": row["total"],
                 "ultima": row["last"],
             }
@@ -195,6 +432,84 @@ class SolicitudesSummaryAdminView(APIView):
         return Response(results)
 
 
+class SolicitudesHeatmapAdminView(APIView):
+    """Heatmap de solicitudes pendientes: ?zoom=0..9 (grilla de 2**zoom x 2**zoom)."""
+
+    permission_classes = [IsAuthenticated, IsAdministrador]
+
+    def get(self, request):
+        try:
+            zoom = int(request.query_params.get("zoom", 6))
+        except (TypeError, ValueError):
+            return Response({"detail": "zoom inválido"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= zoom <= heatmap.MAX_ZOOM:
+            return Response({"detail": f"zoom debe estar entre 0 y {heatmap.MAX_ZOOM}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        bounds, grid = heatmap.get_level(zoom)
+        return Response(heatmap.serialize(zoom, bounds, grid))
+
+
+class SolicitudesClustersAdminView(APIView):
+    """Sitios candidatos para nuevos dispensers, agrupando la demanda pendiente.
+
+    Parámetros: eps (metros, 30), min_weight (3), radius (metros de cobertura
+    de un dispenser existente, 500) y limit (50).
+    """
+
+    permission_classes = [IsAuthenticated, IsAdministrador]
+
+    def get(self, request):
+        try:
+            eps = float(request.query_params.get("eps", 30))
+            min_weight = float(request.query_params.get("min_weight", 3))
+            radius = float(request.query_params.get("radius", 500))
+            limit = int(request.query_params.get("limit", 50))
+        except (TypeError, ValueError):
+            return Response({"detail": "parámetros inválidos"}, status=status.HTTP_400_BAD_REQUEST)
+        if eps <= 0 or radius <= 0 or limit <= 0:
+            return Response({"detail": "eps, radius y limit deben ser positivos"}, status=status.HTTP_400_BAD_REQUEST)
+
+        demanda = list(
+            Solicitud.objects.filter(estado=Solicitud.Estado.PENDIENTE)
+            .values_list("ubicacion_id", "ubicacion__latitud_e6", "ubicacion__longitud_e6")
+            .annotate(total=Count("codigo_solicitud"))
+            .order_by()
+        )
+        dispensers = list(Dispenser.objects.values_list("ubicacion__latitud_e6", "ubicacion__longitud_e6"))
+
+        codigos, lats, lons, totals = zip(*demanda) if demanda else ((), (), (), ())
+        dispenser_lats, dispenser_lons = zip(*dispensers) if dispensers else ((), ())
+        sites = clustering.rank_sites(
+            lats,
+            lons,
+            totals,
+            dispenser_lats,
+            dispenser_lons,
+            eps=eps,
+            min_weight=min_weight,
+            coverage_radius=radius,
+            limit=limit,
+        )
+
+        results = []
+        for rank in range(len(sites["score"])):
+            distance = float(sites["distance"][rank])
+            results.append(
+                {
+                    "ranking": rank + 1,
+                    "latitud": format_coord(int(sites["lat_e6"][rank])),
+                    "longitud": format_coord(int(sites["lon_e6"][rank])),
+                    "total": int(sites["weight"][rank]),
+                    "ubicaciones": int(sites["members"][rank]),
+                    # Ubicación con más demanda del cluster, para usar en solicitudes/accept/.
+                    "codigo_ubicacion": codigos[int(sites["representative"][rank])],
+                    "distancia_dispenser": round(distance, 1) if distance != float("inf") else None,
+                    "score": round(float(sites["score"][rank]), 3),
+                }
+            )
+        return Response(results)
+
+
 class SolicitudAcceptAdminView(APIView):
     """Acepta solicitudes pendientes para una ubicación y crea un Dispenser ahí.
 
@@ -203,6 +518,7 @@ class SolicitudAcceptAdminView(APIView):
 
     permission_classes = [IsAuthenticated, IsAdministrador]
     parser_classes = [MultiPartParser, FormParser]
+    throttle_scope = "admin_write"
 
     def post(self, request):
         codigo_ubicacion = request.data.get("codigo_ubicacion")
@@ -242,8 +558,7 @@ class SolicitudAcceptAdminView(APIView):
         )
 
         ruta = _save_uploaded_file(foto)
-        imagen = Imagen.objects.create(ruta_imagen=ruta)
-        DispenserImagen.objects.create(dispenser=dispenser, imagen=imagen)
+        _attach_imagen(dispenser, ruta)
 
         pendientes.update(
             estado=Solicitud.Estado.ACEPTADA,
@@ -251,5 +566,8 @@ class SolicitudAcceptAdminView(APIView):
             aceptada_por=request.user,
             dispenser=dispenser,
         )
+        heatmap.invalidate()
+        events.dispensers_created([dispenser.codigo_dispenser])
+        events.solicitudes_accepted(ubicacion.codigo_ubicacion, dispenser.codigo_dispenser)
 
         return Response(DispenserSerializer(dispenser).data, status=status.HTTP_201_CREATED)
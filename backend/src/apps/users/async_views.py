@@ -0,0 +1,104 @@
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.http import HttpResponseNotModified
+from django.utils.translation import gettext
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+
+from core.http import error_response, json_response
+from core.throttling import TokenBucket, TokenBucketThrottle, parse_rate
+from . import profile
+from .authentication import aget_request_user
+
+
+class UserProfileAsyncView(View):
+    async def get(self, request):
+        try:
+            user = await aget_request_user(request)
+        except exceptions.AuthenticationFailed as exc:
+            return error_response(request, exc)
+        if user is None:
+            return error_response(request, exceptions.NotAuthenticated())
+
+        cached = await profile.aget_profile(user.pk)
+        if profile.etag_matches(request, cached["etag"]):
+            response = HttpResponseNotModified()
+        else:
+            response = json_response(cached["data"])
+        response["ETag"] = cached["etag"]
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class LoginAsyncView(View):
+    """Equivalente async de api-token-auth/.
+
+    El hash de la contraseña corre en el thread pool (thread_sensitive=False)
+    en lugar del hilo del request: mientras se verifica un login el worker
+    sigue atendiendo otros requests, y como argon2 libera el GIL varios
+    logins se verifican en paralelo.
+    """
+
+    async def post(self, request):
+        ident = TokenBucketThrottle().get_ident(request)
+        bucket = TokenBucket(*parse_rate(settings.THROTTLE_BUCKETS["login"]))
+        allowed, wait = await sync_to_async(bucket.consume)(
+            TokenBucketThrottle.cache_format % {"scope": "login", "ident": f"ip:{ident}"}
+        )
+        if not allowed:
+            response = json_response({"detail": exceptions.Throttled(wait).detail}, status=429)
+            response["Retry-After"] = str(math.ceil(wait))
+            return response
+
+        data = self._parse_body(request)
+        username, password = data.get("username"), data.get("password")
+        missing = {field: [gettext("This field is required.")] for field in ("username", "password") if not data.get(field)}
+        if missing:
+            return json_response(missing, status=400)
+
+        user = await User.objects.filter(username=username).afirst()
+        if user is None:
+            # Mismo costo que un login fallido para no revelar qué usuarios existen.
+            await sync_to_async(make_password, thread_sensitive=False)(password)
+            return self._invalid_credentials()
+
+        hasher_updates = await sync_to_async(self._verify, thread_sensitive=False)(password, user.password)
+        if hasher_updates is None or not user.is_active:
+            return self._invalid_credentials()
+        if hasher_updates:
+            user.password = await sync_to_async(make_password, thread_sensitive=False)(password)
+            await user.asave(update_fields=["password"])
+
+        token, _ = await Token.objects.aget_or_create(user=user)
+        return json_response({"token": token.key})
+
+    @staticmethod
+    def _verify(password, encoded):
+        """None si no coincide; si coincide, si el hash necesita actualizarse."""
+        if not check_password(password, encoded):
+            return None
+        hasher = identify_hasher(encoded)
+        return hasher.algorithm != get_hasher().algorithm or hasher.must_update(encoded)
+
+    @staticmethod
+    def _parse_body(request) -> dict:
+        if request.content_type == "application/json":
+            try:
+                body = json.loads(request.body or b"{}")
+            except ValueError:
+                return {}
+            return body if isinstance(body, dict) else {}
+        return request.POST
+
+    @staticmethod
+    def _invalid_credentials():
+        return json_response(
+            {"non_field_errors": [gettext("Unable to log in with provided credentials.")]},
+            status=400,
+        )
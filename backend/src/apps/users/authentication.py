@@ -0,0 +1,35 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+
+
+async def aget_request_user(request):
+    """Resuelve el usuario de una vista async.
+
+    Replica el orden de REST_FRAMEWORK: primero `Authorization: Token <key>`,
+    luego la sesión de Django. Devuelve None si no hay credenciales; con un
+    header Token inválido lanza AuthenticationFailed con los mismos mensajes
+    que TokenAuthentication.
+    """
+    parts = request.headers.get("Authorization", "").split()
+    if parts and parts[0].lower() == "token":
+        if len(parts) == 1:
+            raise exceptions.AuthenticationFailed(_("Invalid token header. No credentials provided."))
+        if len(parts) > 2:
+            raise exceptions.AuthenticationFailed(_("Invalid token header. Token string should not contain spaces."))
+        try:
+            token = await Token.objects.select_related("user").aget(key=parts[1])
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        return token.user
+
+    user = await request.auser()
+    if user.is_authenticated and user.is_active:
+        return user
+    return None
+
+
+async def ais_administrador(user) -> bool:
+    return user.is_superuser or await user.groups.filter(name="Administrador").aexists()
@@ -0,0 +1,81 @@
+"""Perfil de usuario cacheado con ETag.
+
+El perfil (usuario + Persona + grupos) se arma con una sola consulta y se
+guarda en el cache por usuario junto con su ETag. users.signals lo invalida
+cuando cambian el usuario, su Persona o sus grupos; PROFILE_CACHE_TTL cubre
+los cambios que no disparan señales (QuerySet.update, SQL directo).
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.http import parse_etags
+
+from .models import Persona
+from .serializers import PersonaSerializer
+
+CACHE_KEY = "profile:%s"
+
+USER_FIELDS = ["id", "username", "email", "first_name", "last_name"]
+PERSONA_FIELDS = ["codigo_persona", "nombre", "apellido", "direccion", "telefono", "fecha_nacimiento"]
+
+
+def _profile_rows(user_id: int):
+    # LEFT JOIN a Persona y a los grupos: una fila por grupo (o una sola si no tiene).
+    return User.objects.filter(pk=user_id).values(
+        *USER_FIELDS,
+        *(f"persona__{field}" for field in PERSONA_FIELDS),
+        "groups__name",
+    )
+
+
+def _build(rows: list) -> dict | None:
+    if not rows:
+        return None
+    first = rows[0]
+    persona = None
+    if first["persona__codigo_persona"] is not None:
+        persona = PersonaSerializer(Persona(**{field: first[f"persona__{field}"] for field in PERSONA_FIELDS})).data
+
+    data = {field: first[field] for field in USER_FIELDS}
+    data["persona"] = persona
+    data["grupos"] = [row["groups__name"] for row in rows if row["groups__name"] is not None]
+
+    body = json.dumps(data, sort_keys=True, default=str).encode()
+    return {"etag": '"%s"' % hashlib.sha1(body).hexdigest(), "data": data}
+
+
+def get_profile(user_id: int) -> dict | None:
+    """{"etag", "data"} del perfil, desde el cache o armado con una consulta."""
+    key = CACHE_KEY % user_id
+    profile = cache.get(key)
+    if profile is None:
+        profile = _build(list(_profile_rows(user_id)))
+        if profile is not None:
+            cache.set(key, profile, settings.PROFILE_CACHE_TTL)
+    return profile
+
+
+async def aget_profile(user_id: int) -> dict | None:
+    key = CACHE_KEY % user_id
+    profile = await cache.aget(key)
+    if profile is None:
+        profile = _build([row async for row in _profile_rows(user_id)])
+        if profile is not None:
+            await cache.aset(key, profile, settings.PROFILE_CACHE_TTL)
+    return profile
+
+
+def invalidate(*user_ids) -> None:
+    cache.delete_many([CACHE_KEY % user_id for user_id in user_ids])
+
+
+def etag_matches(request, etag: str) -> bool:
+    """If-None-Match con comparación débil (la compresión agrega el prefijo W/)."""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
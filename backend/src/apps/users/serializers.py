@@ -78,23 +78,3 @@ class PersonaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Persona
         fields = ['codigo_persona', 'nombre', 'apellido', 'direccion', 'telefono', 'fecha_nacimiento']
-
-
-class UserProfileSerializer(serializers.ModelSerializer):
-    persona = serializers.SerializerMethodField()
-    grupos = serializers.SerializerMethodField()
-
-    def get_persona(self, obj):
-        try:
-            persona = obj.persona
-        except Persona.DoesNotExist:
-            return None
-        return PersonaSerializer(persona).data
-
-    def get_grupos(self, obj):
-        return list(obj.groups.values_list('name', flat=True))
-    
-    class Meta:
-        model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'persona', 'grupos']
-
@@ -0,0 +1,38 @@
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import profile
+from .models import Persona
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_profile(sender, instance, **kwargs):
+    profile.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Persona)
+@receiver(post_delete, sender=Persona)
+def invalidate_persona_profile(sender, instance, **kwargs):
+    profile.invalidate(instance.user_id)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_group_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # user.groups.add/remove/clear(...)
+        if action in ("post_add", "post_remove", "post_clear"):
+            profile.invalidate(instance.pk)
+    elif action in ("post_add", "post_remove"):
+        # group.user_set.add/remove(...)
+        profile.invalidate(*pk_set)
+    elif action == "pre_clear":
+        profile.invalidate(*instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_group_members(sender, instance, **kwargs):
+    # Renombrar o borrar un grupo cambia el perfil de todos sus miembros.
+    profile.invalidate(*instance.user_set.values_list("pk", flat=True))
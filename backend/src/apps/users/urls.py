@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.urls import path
 from .views import RegisterView, UserProfileView, AdminCreateEmployeeView
 
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import UserProfileAsyncView as UserProfileView
+
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='auth_register'),
     path('profile/', UserProfileView.as_view(), name='user_profile'),
     path('admin/create-admin-employee/', AdminCreateEmployeeView.as_view(), name='admin_create_admin_employee'),
 ]
-
@@ -1,10 +1,13 @@
 from rest_framework import generics
+from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import BasePermission
 
-from .serializers import UserSerializer, UserProfileSerializer, AdminEmployeeCreateSerializer
+from core.throttling import TokenBucketThrottle
+from . import profile
+from .serializers import UserSerializer, AdminEmployeeCreateSerializer
 from django.contrib.auth.models import User
 
 
@@ -19,18 +22,34 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = UserSerializer
+    throttle_scope = 'register'
 
 
 class AdminCreateEmployeeView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (IsAuthenticated, IsAdministrador)
     serializer_class = AdminEmployeeCreateSerializer
+    throttle_scope = 'admin_write'
+
+
+class LoginView(ObtainAuthToken):
+    # ObtainAuthToken desactiva los throttles por defecto; el login es el
+    # endpoint más caro (hash de contraseña), así que se limita por IP.
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'login'
 
 
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        serializer = UserProfileSerializer(request.user)
-        return Response(serializer.data)
+        cached = profile.get_profile(request.user.pk)
+        if profile.etag_matches(request, cached['etag']):
+            response = Response(status=304)
+        else:
+            response = Response(cached['data'])
+        response['ETag'] = cached['etag']
+        # Por usuario y siempre revalidado: el cliente reusa su copia con If-None-Match.
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 import environ
 import sys
+from corsheaders.defaults import default_headers
 
 # Initialize environment variables
 env = environ.Env()
@@ -25,6 +26,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party
     'rest_framework',
@@ -40,11 +42,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -68,11 +72,74 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
+
+# Sirve los GET de lectura (dispensers, perfil, resumen) y el login con vistas
+# async. Solo tiene sentido detrás de un servidor ASGI (gunicorn + uvicorn).
+ASYNC_READ_VIEWS = env.bool('ASYNC_READ_VIEWS', default=False)
 
 DATABASES = {
     'default': env.db('DATABASE_URL', default='postgres://postgres:postgres@db:5432/mate_social')
 }
 
+# Base de tests (ver config.test_runner): DB_TEST_TEMPLATE clona una base ya
+# migrada en PostgreSQL y TEST_MIGRATE=False crea el esquema desde los modelos.
+DATABASES['default']['TEST'] = {
+    'TEMPLATE': env.str('DB_TEST_TEMPLATE', default=None),
+    'MIGRATE': env.bool('TEST_MIGRATE', default=True),
+}
+
+# Réplicas de lectura (alias replica1, replica2, ...). Los GET de las vistas
+# con `replica_reads = True` se leen de ellas; ver core.routers.
+REPLICA_DATABASES = []
+for _index, _url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[]), start=1):
+    _alias = f'replica{_index}'
+    DATABASES[_alias] = env.db_url_config(_url)
+    DATABASES[_alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(_alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+TEST_RUNNER = 'config.test_runner.FastTestRunner'
+
+# Tras un POST/PUT/DELETE el cliente queda fijado al primario durante estos
+# segundos (cookie o header X-Replica-Pin-Until) para leer sus propias escrituras.
+REPLICA_PIN_SECONDS = env.int('REPLICA_PIN_SECONDS', default=5)
+
+# Conexiones a la base. El servidor es ASGI (uvicorn/gunicorn + UvicornWorker):
+# cada request síncrono corre en un hilo del executor y una conexión
+# persistente quedaría atada a ese hilo, así que por defecto se usa el pool
+# de psycopg 3 (Django >= 5.1) con CONN_MAX_AGE = 0. Para un despliegue
+# WSGI: DB_POOL=False y DB_CONN_MAX_AGE=60.
+for _db in DATABASES.values():
+    _db['CONN_MAX_AGE'] = env.int('DB_CONN_MAX_AGE', default=0)
+    _db['CONN_HEALTH_CHECKS'] = env.bool('DB_CONN_HEALTH_CHECKS', default=True)
+
+    # El pool es incompatible con conexiones persistentes: fuerza CONN_MAX_AGE = 0.
+    if env.bool('DB_POOL', default=True) and _db['ENGINE'] == 'django.db.backends.postgresql':
+        _db['CONN_MAX_AGE'] = 0
+        _db.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': env.int('DB_POOL_MIN_SIZE', default=2),
+            'max_size': env.int('DB_POOL_MAX_SIZE', default=10),
+            'timeout': env.float('DB_POOL_TIMEOUT', default=10.0),
+        }
+
+# Argon2id primero; los hashes PBKDF2 existentes se actualizan al loguearse.
+PASSWORD_HASHERS = [
+    'core.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Parámetros de Argon2 (memoria en KiB). Por defecto los mínimos recomendados
+# por OWASP (19 MiB, 2 pasadas, 1 hilo): menos costo por login que los
+# valores de Django (100 MiB, 8 hilos) sin dejar de ser memory-hard.
+ARGON2_TIME_COST = env.int('ARGON2_TIME_COST', default=2)
+ARGON2_MEMORY_COST = env.int('ARGON2_MEMORY_COST', default=19456)
+ARGON2_PARALLELISM = env.int('ARGON2_PARALLELISM', default=1)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -103,11 +170,72 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOW_ALL_ORIGINS = True # For development
+CORS_ALLOW_HEADERS = (*default_headers, 'x-replica-pin-until')
+CORS_EXPOSE_HEADERS = ['X-Replica-Pin-Until']
 
 
+# Cache compartido (p. ej. redis://redis:6379/1); sin CACHE_URL usa memoria local.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.TokenBucketThrottle',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
+
+# Compresión de respuestas (core.middleware.CompressionMiddleware): brotli si
+# el cliente lo acepta y el paquete está instalado, si no gzip.
+COMPRESSION_MIN_SIZE = env.int('COMPRESSION_MIN_SIZE', default=1024)
+COMPRESSION_GZIP_LEVEL = env.int('COMPRESSION_GZIP_LEVEL', default=6)
+COMPRESSION_BROTLI_QUALITY = env.int('COMPRESSION_BROTLI_QUALITY', default=5)
+
+# Throttling con token buckets (core.throttling). Cada scope es "N/periodo":
+# ráfaga de N requests que se recarga de forma continua en ese periodo.
+THROTTLE_CACHE = 'default'
+THROTTLE_BUCKETS = {
+    'login': env.str('THROTTLE_LOGIN', default='10/min'),
+    'register': env.str('THROTTLE_REGISTER', default='5/min'),
+    'solicitudes': env.str('THROTTLE_SOLICITUDES', default='30/min'),
+    'admin_write': env.str('THROTTLE_ADMIN_WRITE', default='120/min'),
+}
+
+# Heatmap de demanda (dispenser.heatmap): tiempo máximo antes de reconstruir
+# el raster desde la base, aunque se actualice de forma incremental.
+HEATMAP_CACHE_TTL = env.int('HEATMAP_CACHE_TTL', default=3600)
+# Solicitudes nuevas que se suman al leer antes de reconstruir el raster.
+HEATMAP_MAX_PENDING = env.int('HEATMAP_MAX_PENDING', default=5000)
+
+# Perfil de usuario cacheado (users.profile); se invalida por señales.
+PROFILE_CACHE_TTL = env.int('PROFILE_CACHE_TTL', default=3600)
+
+# Solicitudes aceptadas hace más de N días se mueven a SolicitudArchivada
+# con `manage.py archive_solicitudes` (p. ej. desde un cron diario).
+SOLICITUD_ARCHIVE_AFTER_DAYS = env.int('SOLICITUD_ARCHIVE_AFTER_DAYS', default=30)
+
+# Snapshots estáticos del catálogo en MEDIA_ROOT/catalogue (dispenser.catalogue).
+# CATALOGUE_BASE_URL: origen desde el que se sirven (CDN); vacío = MEDIA_URL.
+CATALOGUE_BASE_URL = env.str('CATALOGUE_BASE_URL', default='')
+CATALOGUE_SHARD_DEGREES = env.float('CATALOGUE_SHARD_DEGREES', default=1.0)
+CATALOGUE_PUBLISH_DELAY = env.float('CATALOGUE_PUBLISH_DELAY', default=2.0)
+CATALOGUE_RETENTION_SECONDS = env.int('CATALOGUE_RETENTION_SECONDS', default=86400)
+CATALOGUE_MANIFEST_MAX_AGE = env.int('CATALOGUE_MANIFEST_MAX_AGE', default=10)
+
+# Eventos en tiempo real por SSE (core.events). "memory" reparte solo dentro
+# del proceso; con varios workers usar "redis" (pub/sub en EVENTS_REDIS_URL).
+EVENTS_BACKEND = env.str('EVENTS_BACKEND', default='memory')
+EVENTS_REDIS_URL = env.str('EVENTS_REDIS_URL', default='redis://localhost:6379/2')
+EVENTS_CHANNEL = env.str('EVENTS_CHANNEL', default='anymate:events')
+EVENTS_HEARTBEAT_SECONDS = env.int('EVENTS_HEARTBEAT_SECONDS', default=15)
+EVENTS_RETRY_MS = env.int('EVENTS_RETRY_MS', default=5000)
+EVENTS_QUEUE_SIZE = env.int('EVENTS_QUEUE_SIZE', default=256)
+EVENTS_REPLAY_SIZE = env.int('EVENTS_REPLAY_SIZE', default=1000)
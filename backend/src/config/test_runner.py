@@ -0,0 +1,37 @@
+"""Runner de tests con arranque rápido de la base.
+
+- Reutiliza la base de tests entre corridas (keepdb) salvo con --fresh-db;
+  con las migraciones squasheadas, crearla de cero también es corto.
+- DB_TEST_TEMPLATE (PostgreSQL) clona la base desde una plantilla migrada y
+  TEST_MIGRATE=False arma el esquema directo desde los modelos (settings).
+- Usa MD5 como hasher: Argon2 con los parámetros de producción domina el
+  tiempo de cualquier test que cree usuarios.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class FastTestRunner(DiscoverRunner):
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--fresh-db",
+            action="store_true",
+            help="Recrea la base de tests en vez de reutilizarla.",
+        )
+
+    def __init__(self, *args, fresh_db=False, **kwargs):
+        kwargs["keepdb"] = kwargs.get("keepdb") or not fresh_db
+        super().__init__(*args, **kwargs)
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._fast_hashers = override_settings(
+            PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+        )
+        self._fast_hashers.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._fast_hashers.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,11 +1,26 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework.authtoken import views
+from django.views.decorators.csrf import csrf_exempt
+
+from users.views import LoginView
+
+if settings.ASYNC_READ_VIEWS:
+    from users.async_views import LoginAsyncView
+
+    login_view = csrf_exempt(LoginAsyncView.as_view())
+else:
+    login_view = LoginView.as_view()
 
 urlpatterns = [
     path('admin/', admin.site.urls),
 
     path('api/users/', include('users.urls')),
     path('api/', include('dispenser.urls')),
-    path('api-token-auth/', views.obtain_auth_token),
+    path('api-token-auth/', login_view),
 ]
+
+if settings.DEBUG:
+    # En producción MEDIA_ROOT (imágenes y snapshots del catálogo) lo sirve el servidor estático.
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
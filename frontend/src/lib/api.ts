@@ -1,3 +1,27 @@
+import axios from 'axios';
+
 export function getApiBaseUrl(): string {
   return import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
 }
+
+// Lectura de las propias escrituras con réplicas: después de un POST/PUT/PATCH/DELETE
+// el backend devuelve X-Replica-Pin-Until y, mientras no venza, hay que reenviarlo
+// para que los GET lean del primario. La cookie equivalente no viaja en requests
+// cross-origin, así que el header es el camino que usa el frontend.
+const REPLICA_PIN_HEADER = 'X-Replica-Pin-Until';
+let replicaPinUntil = 0;
+
+axios.interceptors.request.use((config) => {
+  const url = config.url || '';
+  const toApi = url.startsWith(getApiBaseUrl()) || url.startsWith('/');
+  if (toApi && replicaPinUntil * 1000 > Date.now()) {
+    config.headers.set(REPLICA_PIN_HEADER, String(replicaPinUntil));
+  }
+  return config;
+});
+
+axios.interceptors.response.use((response) => {
+  const until = Number(response.headers[REPLICA_PIN_HEADER.toLowerCase()]);
+  if (until > replicaPinUntil) replicaPinUntil = until;
+  return response;
+});
@@ -73,7 +73,16 @@ export default function MapScreen() {
   const fetchDispensers = async () => {
     setLoading(true);
     try {
-      // GET es público (sin sesión) y también funciona con token.
+      // Primero el snapshot estático publicado (ver /api/catalogue/); si no
+      // está disponible, la lista de la API (pública, también con token).
+      try {
+        const manifest = await axios.get(`${baseURL}/api/catalogue/`);
+        const res = await axios.get(manifest.data.full.url);
+        setDispensers(res.data || []);
+        return;
+      } catch {
+        // sigue con la API
+      }
       const res = await axios.get(`${baseURL}/api/dispensers/`, { headers });
       setDispensers(res.data || []);
     } catch (e: any) {
@@ -89,6 +98,37 @@ export default function MapScreen() {
     fetchDispensers();
   }, [token, baseURL]);
 
+  useEffect(() => {
+    // Cambios en vivo por SSE; si el servidor pide resincronizar, recargamos la lista.
+    if (typeof EventSource === 'undefined') return;
+    const source = new EventSource(`${baseURL}/api/events/?topics=dispensers`);
+
+    const upsert = (e: MessageEvent) => {
+      const incoming: DispenserDto[] = JSON.parse(e.data).dispensers || [];
+      const byId = new Map(incoming.map((d) => [d.codigo_dispenser, d]));
+      setDispensers((prev) => [
+        ...prev.map((d) => byId.get(d.codigo_dispenser) ?? d),
+        ...incoming.filter((d) => !prev.some((p) => p.codigo_dispenser === d.codigo_dispenser)),
+      ]);
+    };
+    const changeState = (e: MessageEvent) => {
+      const { codigos, ...fields } = JSON.parse(e.data) as { codigos: number[]; estado?: boolean; permanencia?: boolean };
+      const ids = new Set(codigos);
+      setDispensers((prev) => prev.map((d) => (ids.has(d.codigo_dispenser) ? { ...d, ...fields } : d)));
+    };
+    const remove = (e: MessageEvent) => {
+      const ids = new Set<number>(JSON.parse(e.data).codigos || []);
+      setDispensers((prev) => prev.filter((d) => !ids.has(d.codigo_dispenser)));
+    };
+
+    source.addEventListener('dispenser.created', upsert);
+    source.addEventListener('dispenser.updated', upsert);
+    source.addEventListener('dispenser.state', changeState);
+    source.addEventListener('dispenser.deleted', remove);
+    source.addEventListener('resync', () => fetchDispensers());
+    return () => source.close();
+  }, [baseURL]);
+
   const resetForm = () => {
     setNombre('');
     setEstado(false);